@@ -5,19 +5,100 @@ class Settings(BaseSettings):
     # App
     environment: str = "development"
     test_mode: bool = False  # Enable test mode to bypass JWT auth with X-Test-User-ID header
+    # Shared secret for GET /api/metrics (X-Metrics-Token); unset allows loopback callers only
+    metrics_token: str | None = None
 
     # Database (required)
     database_url: str
+    db_pool_size: int = 10
+    db_max_overflow: int = 20
+    db_pool_timeout_seconds: float = 10.0  # max wait for a pooled connection
+    db_pool_recycle_seconds: int = 1800
+    db_connect_timeout_seconds: int = 10
+    # Ping a pooled connection on checkout only after it sat idle this long (0 = always, <0 = never)
+    db_pre_ping_idle_seconds: float = 60.0
+    db_log_level: str = "INFO"
+    # Apply pending migrations at startup when the schema version is behind; set to
+    # false in production and run `python -m app.db.migrations` as a deploy step instead
+    db_auto_migrate: bool = True
+    # Optional streaming replica for read-only endpoints (same driver/URL form as database_url)
+    database_replica_url: str | None = None
+    # Reads fall back to the primary while replication lag exceeds this
+    db_replica_max_lag_seconds: float = 5.0
+    db_replica_lag_check_interval_seconds: float = 2.0
+    # A user's reads stay on the primary this long after they write
+    db_read_your_writes_seconds: float = 10.0
+
+    # In-process Clerk sub -> user cache (entries are dropped on this process's writes)
+    user_cache_size: int = 50000
+    user_cache_ttl_seconds: int = 60
+
+    # Pool status events, relayed between workers with Postgres LISTEN/NOTIFY
+    pool_events_enabled: bool = True
+    pool_events_reconnect_seconds: float = 5.0
+    # SSE status streams send a comment this often so proxies keep the connection open
+    pool_events_keepalive_seconds: float = 15.0
+    # Pool listing responses, cached per worker until a pool changes status
+    pool_listing_cache_size: int = 5000
+    pool_listing_cache_ttl_seconds: int = 300
 
     # Clerk (required except audience which may be empty)
     clerk_jwks_url: str
     clerk_issuer: str
     clerk_audience: str | None = None
     clerk_secret_key: str | None = None
+    # Upstream base URLs; point both at loadtest/upstream_stub.py to benchmark offline
+    clerk_api_base_url: str = "https://api.clerk.com/v1"
+    # Clerk signing keys: refreshed in the background, on an unknown kid at most once per interval
+    jwks_refresh_interval_seconds: int = 600
+    jwks_retry_interval_seconds: int = 30
+    jwks_fetch_timeout_seconds: float = 3.0
+    jwks_min_miss_refresh_seconds: float = 30.0
+    # Verified-token cache: claims are kept until min(exp, TTL); rejected tokens for the negative TTL
+    jwt_cache_size: int = 10000
+    jwt_cache_ttl_seconds: int = 300
+    jwt_negative_cache_ttl_seconds: int = 30
 
     # YouTube (required for stats)
     youtube_api_key: str
-    
+    youtube_api_base_url: str = "https://www.googleapis.com/youtube/v3"
+    # Daily Data API units (shared by all workers) and the part kept back for interactive adds
+    youtube_daily_quota: int = 10000
+    youtube_interactive_reserve: int = 2000
+    # Each worker adds its calls to the youtube_quota_usage row and re-reads the total this often
+    youtube_quota_sync_seconds: float = 2.0
+    # ETag cache for conditional YouTube requests
+    youtube_etag_cache_size: int = 5000
+    youtube_etag_cache_ttl_seconds: int = 86400
+    # Channel statistics cache (optionally persisted in the channel_stats table)
+    channel_stats_ttl_seconds: int = 6 * 3600
+    channel_stats_cache_size: int = 10000
+    channel_stats_persist: bool = True
+
+    # Shared outbound HTTP clients (YouTube, Clerk)
+    http_timeout_seconds: float = 10.0
+    http_connect_timeout_seconds: float = 5.0
+    http_pool_timeout_seconds: float = 5.0
+    http_max_connections: int = 100
+    http_max_keepalive_connections: int = 20
+    http_keepalive_expiry_seconds: float = 30.0
+    http2_enabled: bool = True  # used only when the h2 package is installed
+
+    # Background video stats refresher
+    video_refresher_enabled: bool = True
+    video_refresh_interval_seconds: int = 300
+    video_stale_after_seconds: int = 3600
+    video_refresh_batch_size: int = 200
+    # Users who listed their videos within this window are refreshed first
+    video_recent_viewer_window_seconds: int = 900
+
+    # Video stats history: rollup schedule, raw snapshot retention (0 keeps forever)
+    video_stats_rollup_enabled: bool = True
+    video_stats_rollup_interval_seconds: int = 900
+    video_stats_raw_retention_days: int = 30
+    # Ranges up to this many days are served from hourly buckets, longer ones from daily
+    video_stats_hourly_max_days: int = 7
+
     # Starknet Contract Addresses
     kolescrow_contract_address: str = "0x02ceed00a4e98084cfbb5e768c3a9ba92c9096f108376ae99f8a09d370c4da2a"
 
@@ -27,6 +108,8 @@ class Settings(BaseSettings):
     starknet_account_address: str | None = None
     starknet_private_key: str | None = None
     attester_pubkey: str | None = None
+    # Bulk pool creation sends this many create_pool calls per multicall transaction
+    starknet_max_calls_per_tx: int = 25
 
     model_config = SettingsConfigDict(env_file=".env", env_file_encoding="utf-8", case_sensitive=False)
 
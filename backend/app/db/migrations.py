@@ -0,0 +1,156 @@
+"""Schema versioning.
+
+Workers only read the latest row of ``schema_version`` at startup; DDL runs
+solely through ``migrate`` (``python -m app.db.migrations``), or at startup when
+``DB_AUTO_MIGRATE`` is on and the database is behind.
+
+To change the schema, update models.py and append a migration below. The
+baseline creates the current models on a fresh database, so later steps must
+be idempotent (``IF NOT EXISTS``) to be safe on both fresh and upgraded ones.
+"""
+import argparse
+import logging
+from datetime import datetime
+from typing import Callable, List, Optional, Tuple
+
+from sqlalchemy import text
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.exc import ProgrammingError
+
+from ..core.config import settings
+from .session import Base
+
+
+logger = logging.getLogger("db")
+
+# Arbitrary constant for pg_advisory_xact_lock so concurrent migrators serialize
+_MIGRATION_LOCK_KEY = 733_002
+
+
+def _baseline(conn: Connection) -> None:
+    from . import models  # noqa: F401 ensure models are imported
+
+    # checkfirst: databases that predate versioning already have these tables
+    Base.metadata.create_all(bind=conn)
+
+
+def _index_videos_last_refreshed_at(conn: Connection) -> None:
+    # Added to the model for the refresher after earlier databases were created
+    conn.execute(text("CREATE INDEX IF NOT EXISTS ix_videos_last_refreshed_at ON videos (last_refreshed_at)"))
+
+
+def _index_pool_listings(conn: Connection) -> None:
+    conn.execute(text("CREATE INDEX IF NOT EXISTS ix_pools_status_id ON pools (status, id)"))
+    conn.execute(text("CREATE INDEX IF NOT EXISTS ix_pools_user_status_id ON pools (user_id, status, id)"))
+
+
+def _create_distributions(conn: Connection) -> None:
+    from .models import Distribution
+
+    Distribution.__table__.create(bind=conn, checkfirst=True)
+
+
+def _index_pool_search(conn: Connection) -> None:
+    from .models import POOL_SEARCH_DOCUMENT
+
+    conn.execute(text("CREATE INDEX IF NOT EXISTS ix_pools_status_brand_id ON pools (status, brand, id)"))
+    conn.execute(text("CREATE INDEX IF NOT EXISTS ix_pools_status_token_id ON pools (status, token, id)"))
+    conn.execute(text("CREATE INDEX IF NOT EXISTS ix_pools_status_deadline_id ON pools (status, deadline_ts, id)"))
+    conn.execute(text(f"CREATE INDEX IF NOT EXISTS ix_pools_search ON pools USING gin (({POOL_SEARCH_DOCUMENT}))"))
+
+
+def _create_youtube_quota_usage(conn: Connection) -> None:
+    from .models import YouTubeQuotaUsage
+
+    YouTubeQuotaUsage.__table__.create(bind=conn, checkfirst=True)
+
+
+def _reorder_videos_last_refreshed_at(conn: Connection) -> None:
+    # Match the refresher's ORDER BY ... NULLS FIRST so it can walk the index
+    conn.execute(text("DROP INDEX IF EXISTS ix_videos_last_refreshed_at"))
+    conn.execute(text("CREATE INDEX ix_videos_last_refreshed_at ON videos (last_refreshed_at NULLS FIRST)"))
+
+
+def _add_users_last_write_at(conn: Connection) -> None:
+    conn.execute(text("ALTER TABLE users ADD COLUMN IF NOT EXISTS last_write_at TIMESTAMP WITHOUT TIME ZONE"))
+
+
+MIGRATIONS: List[Tuple[int, str, Callable[[Connection], None]]] = [
+    (1, "baseline schema", _baseline),
+    (2, "index videos.last_refreshed_at", _index_videos_last_refreshed_at),
+    (3, "composite indexes for pool listings", _index_pool_listings),
+    (4, "distributions table", _create_distributions),
+    (5, "indexes for pool search", _index_pool_search),
+    (6, "shared YouTube quota counter", _create_youtube_quota_usage),
+    (7, "videos.last_refreshed_at index NULLS FIRST", _reorder_videos_last_refreshed_at),
+    (8, "users.last_write_at for read-your-writes", _add_users_last_write_at),
+]
+
+SCHEMA_VERSION = MIGRATIONS[-1][0]
+
+
+def current_version(conn: Connection) -> int:
+    """Latest applied version (0 when the database has never been versioned)."""
+    try:
+        with conn.begin_nested():
+            version: Optional[int] = conn.execute(
+                text("SELECT version FROM schema_version ORDER BY version DESC LIMIT 1")
+            ).scalar()
+    except ProgrammingError:
+        return 0
+    return version or 0
+
+
+def migrate(engine: Engine) -> int:
+    """Apply pending migrations in one transaction; returns the resulting version."""
+    with engine.begin() as conn:
+        conn.execute(text("SELECT pg_advisory_xact_lock(:k)"), {"k": _MIGRATION_LOCK_KEY})
+        version = current_version(conn)
+        for number, description, step in MIGRATIONS:
+            if number <= version:
+                continue
+            logger.info("Applying migration %s: %s", number, description)
+            step(conn)
+            conn.execute(
+                text("INSERT INTO schema_version (version, description, applied_at) VALUES (:v, :d, :t)"),
+                {"v": number, "d": description, "t": datetime.utcnow()},
+            )
+            version = number
+        return version
+
+
+def ensure_schema(engine: Engine) -> None:
+    """Startup check: one primary-key lookup, no DDL when the schema is current."""
+    with engine.connect() as conn:
+        version = current_version(conn)
+    if version == SCHEMA_VERSION:
+        return
+    if version > SCHEMA_VERSION:
+        raise RuntimeError(
+            f"Database schema version {version} is newer than this build ({SCHEMA_VERSION}); deploy the newer code"
+        )
+    if not settings.db_auto_migrate:
+        raise RuntimeError(
+            f"Database schema version {version} is behind {SCHEMA_VERSION}; run `python -m app.db.migrations`"
+        )
+    migrate(engine)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Apply pending database migrations")
+    parser.add_argument("--status", action="store_true", help="print the current and target version and exit")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+
+    from .session import get_engine
+
+    engine = get_engine()
+    if args.status:
+        with engine.connect() as conn:
+            print(f"current={current_version(conn)} target={SCHEMA_VERSION}")
+        return
+    print(f"schema version {migrate(engine)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,7 @@
+from datetime import date
 from typing import Optional
 
-from sqlalchemy import Integer, String, ForeignKey, UniqueConstraint, DateTime
+from sqlalchemy import BigInteger, Boolean, Date, Integer, Numeric, String, ForeignKey, UniqueConstraint, DateTime, Index, text
 from sqlalchemy.orm import relationship, Mapped, mapped_column
 
 from .session import Base
@@ -18,13 +19,20 @@ class User(Base):
     wallet_address: Mapped[Optional[str]] = mapped_column(String, nullable=True, index=True)
     # User type: 'KOL' or 'Advertiser'
     user_type: Mapped[Optional[str]] = mapped_column(String, nullable=True, index=True)
+    # Last write through the API, stamped only with a read replica configured; keeps
+    # the user's reads on the primary for DB_READ_YOUR_WRITES_SECONDS on every worker
+    last_write_at: Mapped[Optional[DateTime]] = mapped_column(DateTime, nullable=True)
 
     videos = relationship("Video", back_populates="user")
 
 
 class Video(Base):
     __tablename__ = "videos"
-    __table_args__ = (UniqueConstraint("user_id", "video_url", name="uq_user_video"),)
+    __table_args__ = (
+        UniqueConstraint("user_id", "video_url", name="uq_user_video"),
+        # The refresher takes never-refreshed videos first, then oldest-first
+        Index("ix_videos_last_refreshed_at", text("last_refreshed_at NULLS FIRST")),
+    )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
     user_id: Mapped[int] = mapped_column(ForeignKey("users.id"), nullable=False, index=True)
@@ -42,8 +50,22 @@ class Video(Base):
     user = relationship("User", back_populates="videos")
 
 
+# Full-text document of a pool; pool search must use this exact expression to hit ix_pools_search
+POOL_SEARCH_DOCUMENT = "to_tsvector('english'::regconfig, coalesce(task_title, '') || ' ' || coalesce(description, ''))"
+
+
 class Pool(Base):
     __tablename__ = "pools"
+    # Keyset pagination for the pool listings (newest first within a status) and
+    # for pool search (filtered by brand/token, or ordered by deadline)
+    __table_args__ = (
+        Index("ix_pools_status_id", "status", "id"),
+        Index("ix_pools_user_status_id", "user_id", "status", "id"),
+        Index("ix_pools_status_brand_id", "status", "brand", "id"),
+        Index("ix_pools_status_token_id", "status", "token", "id"),
+        Index("ix_pools_status_deadline_id", "status", "deadline_ts", "id"),
+        Index("ix_pools_search", text(POOL_SEARCH_DOCUMENT), postgresql_using="gin"),
+    )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
     user_id: Mapped[int | None] = mapped_column(ForeignKey("users.id"), nullable=True, index=True)
@@ -66,3 +88,70 @@ class Pool(Base):
     # Not adding back_populates to avoid importing order issues in this file
 
 
+class ChannelStats(Base):
+    # Last known YouTube channel statistics, shared by every user/video on the channel
+    __tablename__ = "channel_stats"
+
+    channel_id: Mapped[str] = mapped_column(String, primary_key=True)
+    subscriber_count: Mapped[int] = mapped_column(Integer, default=0)
+    fetched_at: Mapped[DateTime] = mapped_column(DateTime, nullable=False)
+
+
+class YouTubeQuotaUsage(Base):
+    # Data API units spent per quota day (Pacific), shared by every worker
+    __tablename__ = "youtube_quota_usage"
+
+    day: Mapped[date] = mapped_column(Date, primary_key=True)
+    used: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    exhausted: Mapped[bool] = mapped_column(Boolean, nullable=False, default=False)
+
+
+class VideoStatSnapshot(Base):
+    # Append-only history: one row per video per stats refresh
+    __tablename__ = "video_stat_snapshots"
+    __table_args__ = (Index("ix_video_stat_snapshots_video_ts", "video_id", "ts"),)
+
+    id: Mapped[int] = mapped_column(BigInteger, primary_key=True)
+    video_id: Mapped[int] = mapped_column(ForeignKey("videos.id", ondelete="CASCADE"), nullable=False)
+    ts: Mapped[DateTime] = mapped_column(DateTime, nullable=False, index=True)
+    views: Mapped[int] = mapped_column(BigInteger, nullable=False)
+    likes: Mapped[int] = mapped_column(Integer, nullable=False)
+    subscribers: Mapped[Optional[int]] = mapped_column(Integer, nullable=True)
+
+
+class VideoStatRollup(Base):
+    # Hourly/daily downsampled snapshots; values are the last observation in the bucket
+    __tablename__ = "video_stat_rollups"
+
+    video_id: Mapped[int] = mapped_column(ForeignKey("videos.id", ondelete="CASCADE"), primary_key=True)
+    granularity: Mapped[str] = mapped_column(String(5), primary_key=True)  # 'hour' | 'day'
+    bucket_start: Mapped[DateTime] = mapped_column(DateTime, primary_key=True)
+    views: Mapped[int] = mapped_column(BigInteger, nullable=False)
+    likes: Mapped[int] = mapped_column(Integer, nullable=False)
+    subscribers: Mapped[Optional[int]] = mapped_column(Integer, nullable=True)
+    samples: Mapped[int] = mapped_column(Integer, nullable=False, default=1)
+
+
+class Distribution(Base):
+    # Per-epoch reward distribution; index is the leaf position (rank by account, byte order)
+    __tablename__ = "distributions"
+    __table_args__ = (
+        Index("ix_distributions_pool_epoch_account", "pool_id", "epoch", "account", unique=True),
+    )
+
+    pool_id: Mapped[int] = mapped_column(BigInteger, primary_key=True)
+    epoch: Mapped[int] = mapped_column(Integer, primary_key=True)
+    index: Mapped[int] = mapped_column(Integer, primary_key=True)
+    account: Mapped[str] = mapped_column(String, nullable=False)
+    # u256 on-chain
+    shares: Mapped[int] = mapped_column(Numeric(78, 0), nullable=False)
+    amount: Mapped[int] = mapped_column(Numeric(78, 0), nullable=False)
+
+
+class SchemaVersion(Base):
+    # One row per applied migration (see db/migrations.py)
+    __tablename__ = "schema_version"
+
+    version: Mapped[int] = mapped_column(Integer, primary_key=True)
+    description: Mapped[str] = mapped_column(String, nullable=False)
+    applied_at: Mapped[DateTime] = mapped_column(DateTime, nullable=False)
@@ -0,0 +1,180 @@
+"""Route read-only service calls to an optional replica.
+
+``read_session(user_sub)`` hands out a replica session unless no replica is
+configured, its replication lag is over ``DB_REPLICA_MAX_LAG_SECONDS`` (or
+unknown), or ``user_sub`` wrote within ``DB_READ_YOUR_WRITES_SECONDS``; in
+those cases it falls back to the primary. Write paths call ``note_write``,
+which stamps the user's row with the unit of work's commit so every worker sees
+the window, not only the one that handled the write.
+"""
+import asyncio
+import logging
+import time
+from contextlib import asynccontextmanager
+from datetime import timedelta
+from typing import AsyncIterator, Optional, Set
+
+from sqlalchemy import func, select, text, update
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from ..core.config import settings
+from ..utils.ttl_cache import TTLCache
+from .models import User
+from .session import (
+    AsyncAdaptedQueuePool,
+    PoolMetrics,
+    _InstrumentedConnect,
+    _install_idle_pre_ping,
+    _pool_kwargs,
+    async_session,
+    before_commit,
+)
+
+
+logger = logging.getLogger("db")
+
+replica_engine = None
+ReplicaSessionLocal = None
+
+replica_pool_metrics = PoolMetrics(lambda: replica_engine.sync_engine.pool if replica_engine is not None else None)
+
+
+class InstrumentedReplicaPool(_InstrumentedConnect, AsyncAdaptedQueuePool):
+    metrics = replica_pool_metrics
+
+
+# user sub -> time of their last write through this process; spares the primary
+# lookup for the common case of reading back on the same worker
+_recent_writers: TTLCache = TTLCache(maxsize=100_000, ttl=settings.db_read_your_writes_seconds)
+
+# 0 when caught up; None when unknown (never checked, or the check failed)
+_LAG_SQL = text(
+    """
+    SELECT CASE
+        WHEN NOT pg_is_in_recovery() THEN 0
+        WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+        ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)
+    END
+    """
+)
+
+
+class _LagProbe:
+    def __init__(self) -> None:
+        self.lag_seconds: Optional[float] = None
+        self.checked_at = 0.0
+        self._lock = asyncio.Lock()
+        self.replica_reads = 0
+        self.primary_fallbacks = 0
+        self.read_your_writes = 0
+
+    async def current(self) -> Optional[float]:
+        if time.monotonic() - self.checked_at < settings.db_replica_lag_check_interval_seconds:
+            return self.lag_seconds
+        async with self._lock:
+            # Another request may have refreshed it while we waited
+            if time.monotonic() - self.checked_at < settings.db_replica_lag_check_interval_seconds:
+                return self.lag_seconds
+            try:
+                async with ReplicaSessionLocal() as db:
+                    self.lag_seconds = float((await db.execute(_LAG_SQL)).scalar() or 0)
+            except Exception as e:
+                logger.warning("replica lag check failed (%s); reading from primary", e)
+                self.lag_seconds = None
+            self.checked_at = time.monotonic()
+            return self.lag_seconds
+
+    def snapshot(self) -> dict:
+        return {
+            "configured": replica_engine is not None,
+            "lag_seconds": self.lag_seconds,
+            "replica_reads": self.replica_reads,
+            "primary_fallbacks": self.primary_fallbacks,
+            "read_your_writes": self.read_your_writes,
+            "pool": replica_pool_metrics.snapshot(),
+        }
+
+
+lag_probe = _LagProbe()
+
+
+def init_replica_engine() -> None:
+    global replica_engine, ReplicaSessionLocal
+    if replica_engine is None and settings.database_replica_url:
+        replica_engine = create_async_engine(
+            settings.database_replica_url, poolclass=InstrumentedReplicaPool, **_pool_kwargs()
+        )
+        if settings.db_pre_ping_idle_seconds >= 0:
+            _install_idle_pre_ping(replica_engine.sync_engine.pool, replica_pool_metrics)
+        ReplicaSessionLocal = async_sessionmaker(replica_engine, autoflush=False, expire_on_commit=False)
+
+
+async def dispose_replica_engine() -> None:
+    global replica_engine, ReplicaSessionLocal
+    if replica_engine is not None:
+        await replica_engine.dispose()
+        replica_engine = None
+        ReplicaSessionLocal = None
+
+
+def note_write(db: AsyncSession, user_sub: Optional[str]) -> None:
+    """Pin ``user_sub``'s reads to the primary for the read-your-writes window,
+    from when ``db``'s unit of work commits."""
+    if user_sub and settings.database_replica_url:
+        _recent_writers.set(user_sub, time.monotonic())
+        writers: Set[str] = db.info.setdefault("writers", set())
+        if not writers:
+            before_commit(db, lambda: _stamp_writers(db, writers))
+        writers.add(user_sub)
+
+
+async def _stamp_writers(db: AsyncSession, writers: Set[str]) -> None:
+    # DB clock on both sides, so workers' clocks don't matter
+    await db.execute(update(User).where(User.sub.in_(sorted(writers))).values(last_write_at=func.now()))
+
+
+async def _wrote_recently(user_sub: str, primary: Optional[AsyncSession]) -> bool:
+    """Whether ``user_sub`` wrote within the window through any worker (asks the primary)."""
+    stmt = select(User.id).where(
+        User.sub == user_sub,
+        User.last_write_at > func.now() - timedelta(seconds=settings.db_read_your_writes_seconds),
+    )
+    if primary is not None:
+        return (await primary.execute(stmt)).first() is not None
+    async with async_session() as db:
+        return (await db.execute(stmt)).first() is not None
+
+
+async def _use_replica(user_sub: Optional[str], primary: Optional[AsyncSession] = None) -> bool:
+    if ReplicaSessionLocal is None:
+        init_replica_engine()
+        if ReplicaSessionLocal is None:
+            return False
+    lag = await lag_probe.current()
+    if lag is None or lag > settings.db_replica_max_lag_seconds:
+        lag_probe.primary_fallbacks += 1
+        return False
+    if user_sub and (_recent_writers.peek(user_sub) is not None or await _wrote_recently(user_sub, primary)):
+        lag_probe.read_your_writes += 1
+        return False
+    lag_probe.replica_reads += 1
+    return True
+
+
+@asynccontextmanager
+async def read_session(
+    user_sub: Optional[str] = None, primary: Optional[AsyncSession] = None
+) -> AsyncIterator[AsyncSession]:
+    """Session for read-only work: ``async with read_session(sub, db) as s:``.
+
+    When the read stays on the primary and the caller passes its own session as
+    ``primary``, that session is reused rather than checking out another connection.
+    """
+    if await _use_replica(user_sub, primary):
+        async with ReplicaSessionLocal() as db:
+            yield db
+    elif primary is not None:
+        yield primary
+    else:
+        async with async_session() as db:
+            yield db
@@ -1,51 +1,251 @@
-from sqlalchemy import create_engine, text
+import logging
+import threading
+import time
+from typing import Awaitable, Callable
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.exc import DisconnectionError, TimeoutError as PoolTimeoutError
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker, DeclarativeBase
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
 
 from ..core.config import settings
 
 
+logger = logging.getLogger("db")
+logger.setLevel(settings.db_log_level.upper())
+
+
 class Base(DeclarativeBase):
     pass
 
 
 engine = None
 SessionLocal = None
+# Async engine on the same URL (psycopg 3 serves both); used by the request path
+async_engine = None
+AsyncSessionLocal = None
 
 
-def init_engine_and_create_tables() -> None:
-    global engine, SessionLocal
-    if engine is None:
-        print("Initializing database engine...")
+class PoolMetrics:
+    """Checkout-wait and in-use counters for one engine's connection pool."""
+
+    def __init__(self, get_pool) -> None:
+        self._get_pool = get_pool
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.timeouts = 0
+        self.wait_total_seconds = 0.0
+        self.wait_max_seconds = 0.0
+        self.pings = 0
+        self.stale_connections = 0
+
+    def observe_wait(self, seconds: float, timed_out: bool = False) -> None:
+        with self._lock:
+            if timed_out:
+                self.timeouts += 1
+                return
+            self.checkouts += 1
+            self.wait_total_seconds += seconds
+            if seconds > self.wait_max_seconds:
+                self.wait_max_seconds = seconds
+
+    def snapshot(self) -> dict:
+        pool = self._get_pool()
+        with self._lock:
+            data = {
+                "checkouts": self.checkouts,
+                "checkout_timeouts": self.timeouts,
+                "checkout_wait_avg_ms": round(1000 * self.wait_total_seconds / self.checkouts, 3) if self.checkouts else 0.0,
+                "checkout_wait_max_ms": round(1000 * self.wait_max_seconds, 3),
+                "pre_pings": self.pings,
+                "stale_connections_replaced": self.stale_connections,
+            }
+        if isinstance(pool, QueuePool):
+            data.update(
+                {
+                    "pool_size": pool.size(),
+                    "in_use": pool.checkedout(),
+                    "idle": pool.checkedin(),
+                    "overflow": pool.overflow(),
+                }
+            )
+        return data
+
+
+pool_metrics = PoolMetrics(lambda: engine.pool if engine is not None else None)
+async_pool_metrics = PoolMetrics(lambda: async_engine.sync_engine.pool if async_engine is not None else None)
+
+
+class _InstrumentedConnect:
+    metrics: PoolMetrics
+
+    def connect(self):  # type: ignore[override]
+        start = time.perf_counter()
         try:
-            engine = create_engine(settings.database_url, pool_pre_ping=True)
-            SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
-            from . import models  # noqa: F401 ensure models are imported
-            Base.metadata.create_all(bind=engine)
-            print("✅ Database engine initialized successfully")
-            print("✅ Database tables created/verified successfully")
-        except Exception as e:
-            print(f"❌ Failed to initialize database engine: {e}")
+            conn = super().connect()  # type: ignore[misc]
+        except PoolTimeoutError:
+            self.metrics.observe_wait(time.perf_counter() - start, timed_out=True)
+            logger.warning("db pool checkout timed out", extra={"pool_status": self.status()})  # type: ignore[attr-defined]
             raise
+        self.metrics.observe_wait(time.perf_counter() - start)
+        return conn
 
 
-def get_db_session():
-    global SessionLocal
+class InstrumentedQueuePool(_InstrumentedConnect, QueuePool):
+    metrics = pool_metrics
+
+
+class InstrumentedAsyncQueuePool(_InstrumentedConnect, AsyncAdaptedQueuePool):
+    metrics = async_pool_metrics
+
+
+def _pool_kwargs() -> dict:
+    return {
+        "pool_size": settings.db_pool_size,
+        "max_overflow": settings.db_max_overflow,
+        "pool_timeout": settings.db_pool_timeout_seconds,
+        "pool_recycle": settings.db_pool_recycle_seconds,
+        "pool_use_lifo": True,
+        "connect_args": {"connect_timeout": settings.db_connect_timeout_seconds},
+    }
+
+
+def _install_idle_pre_ping(target, metrics: PoolMetrics) -> None:
+    """Ping a pooled connection on checkout only if it sat idle longer than
+    DB_PRE_PING_IDLE_SECONDS, instead of a SELECT 1 on every session."""
+    idle_limit = settings.db_pre_ping_idle_seconds
+
+    @event.listens_for(target, "checkin")
+    def _on_checkin(dbapi_conn, record):
+        record.info["checked_in_at"] = time.monotonic()
+
+    @event.listens_for(target, "checkout")
+    def _on_checkout(dbapi_conn, record, proxy):
+        checked_in_at = record.info.get("checked_in_at")
+        if checked_in_at is None or time.monotonic() - checked_in_at < idle_limit:
+            return
+        metrics.pings += 1
+        try:
+            cursor = dbapi_conn.cursor()
+            cursor.execute("SELECT 1")
+            cursor.close()
+        except Exception:
+            metrics.stale_connections += 1
+            logger.info("db connection went stale while idle; replacing it")
+            # Tells the pool to discard this connection and retry with a fresh one
+            raise DisconnectionError()
+
+
+def get_engine():
+    """Sync engine, created on first use; does not touch the schema."""
+    global engine, SessionLocal
+    if engine is None:
+        engine = create_engine(settings.database_url, poolclass=InstrumentedQueuePool, **_pool_kwargs())
+        if settings.db_pre_ping_idle_seconds >= 0:
+            _install_idle_pre_ping(engine.pool, pool_metrics)
+        SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    return engine
+
+
+_schema_checked = False
+
+
+def init_engine() -> None:
+    """Create the engine and verify the schema version (DDL only if it is behind)."""
+    global _schema_checked
+    if _schema_checked:
+        return
+    logger.info("Initializing database engine")
+    try:
+        from .migrations import ensure_schema
+
+        ensure_schema(get_engine())
+        _schema_checked = True
+        logger.info(
+            "Database engine initialized",
+            extra={"pool_size": settings.db_pool_size, "max_overflow": settings.db_max_overflow},
+        )
+    except Exception:
+        logger.exception("Failed to initialize database engine")
+        raise
+
+
+def sync_session():
+    """New sync Session for use as ``with sync_session() as db:`` (background jobs)."""
     if SessionLocal is None:
-        init_engine_and_create_tables()
-    
-    print("🔗 Creating new database session")
-    db = SessionLocal()
+        init_engine()
+    return SessionLocal()
+
+
+def get_db_session():
+    db = sync_session()
     try:
-        # Test the connection to ensure it's working
-        db.execute(text("SELECT 1"))
-        print("✅ Database connection established successfully")
         yield db
-    except Exception as e:
-        print(f"❌ Database connection failed: {e}")
+    except Exception:
+        logger.debug("Rolling back database session after error", exc_info=True)
         db.rollback()
         raise
     finally:
-        print("🔒 Closing database session")
         db.close()
 
 
+def init_async_engine() -> None:
+    global async_engine, AsyncSessionLocal
+    if async_engine is None:
+        async_engine = create_async_engine(
+            settings.database_url, poolclass=InstrumentedAsyncQueuePool, **_pool_kwargs()
+        )
+        if settings.db_pre_ping_idle_seconds >= 0:
+            _install_idle_pre_ping(async_engine.sync_engine.pool, async_pool_metrics)
+        AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
+
+async def dispose_async_engine() -> None:
+    global async_engine, AsyncSessionLocal
+    if async_engine is not None:
+        await async_engine.dispose()
+        async_engine = None
+        AsyncSessionLocal = None
+
+
+def async_session() -> AsyncSession:
+    """New AsyncSession for use as ``async with async_session() as db:``."""
+    if AsyncSessionLocal is None:
+        init_async_engine()
+    return AsyncSessionLocal()
+
+
+def before_commit(db: AsyncSession, fn: Callable[[], Awaitable[None]]) -> None:
+    """Run ``fn`` as the last step inside the unit of work owning ``db``, just before it commits."""
+    db.info.setdefault("before_commit", []).append(fn)
+
+
+def after_commit(db: AsyncSession, fn: Callable[[], None]) -> None:
+    """Run ``fn`` once the unit of work owning ``db`` has committed (e.g. cache updates)."""
+    db.info.setdefault("after_commit", []).append(fn)
+
+
+async def release_connection(db: AsyncSession) -> None:
+    """Commit whatever ``db`` has done so far so its pooled connection goes back to
+    the pool, e.g. before awaiting a slow upstream call. No-op if nothing ran yet."""
+    if db.in_transaction():
+        await db.commit()
+
+
+async def get_unit_of_work():
+    """Request-scoped AsyncSession: services share it and never commit themselves;
+    it is committed once when the request handler returns, rolled back on error.
+    A connection is only checked out once the first statement runs."""
+    async with async_session() as db:
+        try:
+            yield db
+            for fn in db.info.pop("before_commit", []):
+                await fn()
+            await db.commit()
+        except Exception:
+            logger.debug("Rolling back unit of work after error", exc_info=True)
+            await db.rollback()
+            raise
+        for fn in db.info.pop("after_commit", []):
+            fn()
@@ -1,15 +1,23 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from .routers.health import router as health_router
+from .routers.metrics import router as metrics_router
 from .routers.youtube import router as youtube_router
 from .routers.user import router as user_router
 from .routers.pools import router as pools_router
 from .routers.wallet import router as wallet_router
-from .db.session import init_engine_and_create_tables
+from .db.session import init_engine, init_async_engine, dispose_async_engine
+from .db.routing import dispose_replica_engine, init_replica_engine
 from .routers.merkle_router import router as merkle_router
 from .routers.finalize_router import router as finalize_router
 from .routers.pool_router import router as pool_router
 from .routers.contract_router import router as contract_router
+from .utils.http_client import init_http_clients, close_http_clients
+from .services.video_refresher import start_video_refresher, stop_video_refresher
+from .services.video_stats import start_video_stats_rollup, stop_video_stats_rollup
+from .services.jwks import start_jwks_refresher, stop_jwks_refresher
+from .services.pool_events import pool_events
+from .utils.youtube_quota import start_youtube_quota_sync, stop_youtube_quota_sync
 
 def create_app() -> FastAPI:
     app = FastAPI(title="MarkFair API", version="0.1.0")
@@ -25,6 +33,7 @@ def create_app() -> FastAPI:
 
     # Routers
     app.include_router(health_router, prefix="/api")
+    app.include_router(metrics_router, prefix="/api")
     app.include_router(merkle_router, prefix="/api/merkle")
     app.include_router(finalize_router, prefix="/api/finalize")
     app.include_router(youtube_router, prefix="/api/youtube")
@@ -42,4 +51,28 @@ app = create_app()
 
 @app.on_event("startup")
 def on_startup() -> None:
-    init_engine_and_create_tables()
+    init_engine()
+    init_async_engine()
+    init_replica_engine()
+
+
+@app.on_event("startup")
+async def start_background_jobs() -> None:
+    init_http_clients()
+    start_jwks_refresher()
+    start_youtube_quota_sync()
+    pool_events.start()
+    start_video_refresher()
+    start_video_stats_rollup()
+
+
+@app.on_event("shutdown")
+async def stop_background_jobs() -> None:
+    await stop_video_refresher()
+    await stop_video_stats_rollup()
+    await stop_jwks_refresher()
+    await stop_youtube_quota_sync()
+    await pool_events.stop()
+    await close_http_clients()
+    await dispose_async_engine()
+    await dispose_replica_engine()
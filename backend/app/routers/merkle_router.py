@@ -7,10 +7,14 @@ from ..schemas.merkle_schemas import (
     MerkleProofRequest, MerkleProofResponse
 )
 from ..utils.merkle_utils import (
-    secure_hash, leaf_hash, build_merkle_tree, verify_merkle_proof,
-    generate_merkle_proof
+    secure_hash, leaf_hash, build_merkle_tree, verify_merkle_proof
 )
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+
+from ..db.session import get_db_session
 from ..services.contract_service import contract_service
+from ..services.distribution_service import get_merkle_proof
 
 router = APIRouter(tags=["merkle"])
 
@@ -140,7 +144,7 @@ async def verify_with_contract(request: ContractVerifyRequest):
         raise HTTPException(status_code=500, detail=f"Error verifying with contract: {str(e)}")
 
 @router.post("/generate-proof", response_model=MerkleProofResponse)
-async def generate_proof_for_account(request: MerkleProofRequest):
+async def generate_proof_for_account(request: MerkleProofRequest, db: Session = Depends(get_db_session)):
     """
     Generate a merkle proof for a specific account in a pool's epoch.
     
@@ -151,18 +155,10 @@ async def generate_proof_for_account(request: MerkleProofRequest):
         # Get the epoch metadata from the contract
         epoch_meta = await contract_service.get_epoch_meta(request.pool_id, request.epoch)
         
-        # Generate the proof (this would need to be implemented properly with actual distribution data)
-        # For now, we'll use a mock implementation
-        from sqlalchemy.orm import Session
-        from ..db.session import get_db_session
-        
-        # This would be replaced with actual DB access in a real implementation
-        db = next(get_db_session())
-        proof_elements, leaf_value = generate_merkle_proof(
-            str(request.pool_id), 
-            request.epoch, 
-            request.account, 
-            db
+        # Generate the proof from the stored distribution for this epoch
+        # (sync DB work, kept off the event loop)
+        entry, proof_elements, leaf_value = await run_in_threadpool(
+            get_merkle_proof, db, request.pool_id, request.epoch, request.account
         )
         
         # Convert proof elements to the format expected by the contract
@@ -172,18 +168,18 @@ async def generate_proof_for_account(request: MerkleProofRequest):
         valid = await contract_service.verify_epoch_proof(
             request.pool_id,
             request.epoch,
-            5,  # This would be the actual index from the distribution data
+            entry["index"],
             request.account,
-            150,  # This would be the actual shares from the distribution data
-            1500,  # This would be the actual amount from the distribution data
+            entry["shares"],
+            entry["amount"],
             contract_proof
         )
         
         return {
             "proof": contract_proof,
-            "index": 5,  # This would be the actual index from the distribution data
-            "shares": 150,  # This would be the actual shares from the distribution data
-            "amount": 1500,  # This would be the actual amount from the distribution data
+            "index": entry["index"],
+            "shares": entry["shares"],
+            "amount": entry["amount"],
             "valid": valid
         }
     except Exception as e:
@@ -0,0 +1,44 @@
+import hmac
+from typing import Optional
+
+from fastapi import APIRouter, Depends, Header, HTTPException, Request, status
+
+from ..core.config import settings
+from ..db.routing import lag_probe
+from ..db.session import async_pool_metrics, pool_metrics
+from ..services.auth import token_cache, token_cache_stats
+from ..services.jwks import jwks
+from ..services.pool_events import pool_events
+from ..services.pool_service import listing_cache
+from ..services.user_resolver import user_cache
+from ..utils.youtube_client import etag_cache, etag_stats
+from ..utils.youtube_quota import youtube_quota
+
+
+router = APIRouter(tags=["metrics"])
+
+
+def require_internal(request: Request, x_metrics_token: Optional[str] = Header(None)) -> None:
+    """Operators only: the METRICS_TOKEN in X-Metrics-Token, or a loopback caller when no token is set."""
+    if settings.metrics_token:
+        if x_metrics_token and hmac.compare_digest(x_metrics_token, settings.metrics_token):
+            return
+    elif request.client is not None and request.client.host in ("127.0.0.1", "::1"):
+        return
+    raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Metrics are internal")
+
+
+@router.get("/metrics", dependencies=[Depends(require_internal)])
+def metrics() -> dict:
+    return {
+        "db_pool": pool_metrics.snapshot(),
+        "db_pool_async": async_pool_metrics.snapshot(),
+        "db_replica": lag_probe.snapshot(),
+        "user_cache": user_cache.stats(),
+        "jwt_cache": {**token_cache.stats(), **token_cache_stats},
+        "jwks": jwks.snapshot(),
+        "pool_events": pool_events.snapshot(),
+        "pool_listing_cache": listing_cache.stats(),
+        "youtube_quota": youtube_quota.snapshot(),
+        "youtube_etag_cache": {**etag_cache.stats(), **etag_stats},
+    }
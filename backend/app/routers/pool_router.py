@@ -1,11 +1,12 @@
 from fastapi import APIRouter, Depends, HTTPException, Query, Path
 from sqlalchemy.orm import Session
 from typing import Optional
+from starlette.concurrency import run_in_threadpool
 
 from ..db.session import get_db_session
 from ..schemas.pool_schemas import ProofResponse, ProofRequest
 from ..services.auth import get_current_user, AuthenticatedUser
-from ..utils.merkle_utils import generate_merkle_proof
+from ..services.distribution_service import get_merkle_proof
 
 router = APIRouter()
 
@@ -23,12 +24,8 @@ async def get_user_proof(
     """
     try:
         # Generate the merkle proof for the user in the specified pool and epoch
-        proof, leaf = generate_merkle_proof(
-            pool_id=pool_id,
-            epoch=epoch,
-            user_address=user,
-            db=db
-        )
+        # Streams the whole epoch from the DB; keep it off the event loop
+        _, proof, leaf = await run_in_threadpool(get_merkle_proof, db, int(pool_id), epoch or 0, user)
         
         return ProofResponse(
             proof=proof,
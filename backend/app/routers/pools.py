@@ -1,23 +1,64 @@
-from fastapi import APIRouter, Depends, HTTPException, status, BackgroundTasks
+import asyncio
+import json
+from typing import AsyncIterator, Optional
 
-from ..schemas.pool import PoolCreateRequest, PoolCreateResponse
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status, BackgroundTasks
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..schemas.pool import PoolBulkCreateRequest, PoolBulkCreateResponse, PoolCreateRequest, PoolCreateResponse
 from ..services.pool_service import (
     create_pool_db_then_chain,
+    create_pools_bulk,
+    process_bulk_pool_creation,
     process_pool_creation,
     get_pool_status,
     list_all_pools,
+    list_pools_for_user,
+    search_pools,
+    SEARCH_SORTS,
+    cached_listing,
+    DEFAULT_PAGE_SIZE,
+    MAX_PAGE_SIZE,
 )
-from ..services.auth import get_current_user
+from ..services.pool_events import pool_events
+from ..services.auth import AuthenticatedUser, get_current_user, get_principal, require_kol
+from ..db.session import async_session, get_unit_of_work
 from ..core.config import settings
 
 
 router = APIRouter(tags=["pools"], prefix="/api/pools")
 
 
+def _etag_matches(request: Request, etag: str) -> bool:
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    # If-None-Match uses weak comparison
+    return etag in (t.strip().removeprefix("W/") for t in header.split(","))
+
+
+async def _listing_response(request: Request, key: tuple, load) -> Response:
+    # A warm entry answers (including the 304) without touching the DB
+    etag, body = await cached_listing(key, load)
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+    if _etag_matches(request, etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
+
+
 @router.post("", response_model=PoolCreateResponse)
-def create_pool(req: PoolCreateRequest, bg: BackgroundTasks, user=Depends(get_current_user)):
+async def create_pool(
+    req: PoolCreateRequest,
+    bg: BackgroundTasks,
+    user=Depends(get_current_user),
+    db: AsyncSession = Depends(get_unit_of_work),
+):
     try:
-        pool_id = create_pool_db_then_chain(
+        pool_id = await create_pool_db_then_chain(
+            db,
             token=req.token,
             brand=req.brand,
             deadline_ts=req.deadline_ts,
@@ -41,29 +82,136 @@ def create_pool(req: PoolCreateRequest, bg: BackgroundTasks, user=Depends(get_cu
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
 
 
+@router.post("/bulk", response_model=PoolBulkCreateResponse)
+async def create_pools_in_bulk(
+    req: PoolBulkCreateRequest,
+    bg: BackgroundTasks,
+    user: AuthenticatedUser = Depends(get_principal),
+    db: AsyncSession = Depends(get_unit_of_work),
+):
+    """Create up to 100 pools with one INSERT and one background chain job; ids are
+    returned right away and the pools move to created/failed like single creates."""
+    attester_pubkey = int(settings.attester_pubkey, 16) if settings.attester_pubkey else 0
+    results, jobs = await create_pools_bulk(db, user, req.pools, attester_pubkey)
+    if jobs:
+        bg.add_task(process_bulk_pool_creation, jobs)
+    return PoolBulkCreateResponse(results=results, submitted=len(jobs))
+
+
 @router.get("/all")
-def list_every_pool(user=Depends(get_current_user)):
-    # Restrict to KOL users only
-    # Minimal check: rely on user profile stored in DB; fetch via service to verify user_type
-    from ..db.session import get_db_session
-    from ..db.models import User
+async def list_every_pool(
+    request: Request,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[int] = Query(None, description="next_cursor from the previous page"),
+    user: AuthenticatedUser = Depends(require_kol),
+    db: AsyncSession = Depends(get_unit_of_work),
+):
+    return await _listing_response(request, ("all", limit, cursor), lambda: list_all_pools(db, limit, cursor))
+
+
+# process_pool_creation leaves a pool in one of these
+TERMINAL_STATUSES = ("created", "failed")
+
+
+def _sse(data: dict) -> str:
+    return f"event: status\ndata: {json.dumps(data)}\n\n"
 
-    with next(get_db_session()) as db:  # type: ignore
-        u = db.query(User).filter(User.sub == user.sub).first()
-        if not u or (u.user_type or "").upper() != "KOL":
-            raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Only KOL can access this endpoint")
-    return list_all_pools()
+
+async def _status_stream(pool_id: int, queue: asyncio.Queue, current: dict) -> AsyncIterator[str]:
+    try:
+        yield _sse(current)
+        last = current["status"]
+        while last not in TERMINAL_STATUSES:
+            try:
+                await asyncio.wait_for(queue.get(), settings.pool_events_keepalive_seconds)
+            except asyncio.TimeoutError:
+                if pool_events.connected:
+                    yield ": keepalive\n\n"
+                    continue
+                # No relay from other workers right now: poll the row instead
+            # Events only carry the status; tx_hash/error come from the row
+            async with async_session() as db:
+                event = await get_pool_status(db, pool_id, fresh=True)
+            if event["status"] == last:
+                yield ": keepalive\n\n"
+                continue
+            last = event["status"]
+            yield _sse(event)
+    finally:
+        pool_events.unwatch(pool_id, queue)
+
+
+@router.get("/search")
+async def search(
+    q: Optional[str] = Query(None, max_length=200, description="Keywords matched against task title and description"),
+    brand: Optional[str] = None,
+    token: Optional[str] = None,
+    deadline_from: Optional[int] = Query(None, description="Earliest deadline_ts"),
+    deadline_to: Optional[int] = Query(None, description="Latest deadline_ts"),
+    sort: str = Query("newest", description=" | ".join(SEARCH_SORTS)),
+    fields: Optional[str] = Query(None, description="Comma-separated fields to return (pool_id is always included)"),
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
+    user: AuthenticatedUser = Depends(require_kol),
+    db: AsyncSession = Depends(get_unit_of_work),
+):
+    try:
+        return await search_pools(
+            db,
+            q=q,
+            brand=brand,
+            token=token,
+            deadline_from=deadline_from,
+            deadline_to=deadline_to,
+            sort=sort,
+            fields=[f.strip() for f in fields.split(",") if f.strip()] if fields else None,
+            limit=limit,
+            cursor=cursor,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+
+@router.get("/{pool_id}/events")
+async def pool_status_events(
+    pool_id: int, user=Depends(get_current_user), db: AsyncSession = Depends(get_unit_of_work)
+) -> StreamingResponse:
+    """Server-Sent Events stream of the pool's status (same fields as GET /{pool_id}).
+    The current status is sent first; the stream ends once the pool is created or failed."""
+    # Watch before reading so a transition between the two is not lost
+    queue = pool_events.watch(pool_id)
+    try:
+        current = await get_pool_status(db, pool_id, fresh=True)
+    except Exception:
+        pool_events.unwatch(pool_id, queue)
+        raise
+    if "status" not in current:
+        pool_events.unwatch(pool_id, queue)
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Pool not found")
+    return StreamingResponse(
+        _status_stream(pool_id, queue, current),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
 
 
 @router.get("/{pool_id}")
-def get_pool(pool_id: int, user=Depends(get_current_user)):
-    return get_pool_status(pool_id)
+async def get_pool(pool_id: int, user=Depends(get_current_user), db: AsyncSession = Depends(get_unit_of_work)):
+    return await get_pool_status(db, pool_id, user.sub)
 
 
 @router.get("")
-def list_my_pools(user=Depends(get_current_user)):
-    from ..services.pool_service import list_pools_for_user
-
-    return list_pools_for_user(user.sub)
+async def list_my_pools(
+    request: Request,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[int] = Query(None, description="next_cursor from the previous page"),
+    user: AuthenticatedUser = Depends(get_principal),
+    db: AsyncSession = Depends(get_unit_of_work),
+):
+    return await _listing_response(
+        request,
+        ("mine", user.user_id, user.role, limit, cursor),
+        lambda: list_pools_for_user(db, user, limit, cursor),
+    )
 
 
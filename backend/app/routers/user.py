@@ -1,7 +1,9 @@
 from fastapi import APIRouter, Depends
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from ..schemas.user import UserTypeSetRequest, UserTypeResponse
 from ..services.auth import get_current_user
+from ..db.session import get_unit_of_work
 from ..services.youtube_service import set_user_type, get_user_profile
 
 
@@ -9,13 +11,15 @@ router = APIRouter(tags=["user"], prefix="/api/user")
 
 
 @router.post("/type", response_model=UserTypeResponse)
-def set_type(req: UserTypeSetRequest, user=Depends(get_current_user)) -> dict:
-    set_user_type(user_id=user.sub, user_type=req.user_type)
+async def set_type(
+    req: UserTypeSetRequest, user=Depends(get_current_user), db: AsyncSession = Depends(get_unit_of_work)
+) -> dict:
+    await set_user_type(db, user_id=user.sub, user_type=req.user_type)
     return {"user_type": req.user_type}
 
 
 @router.get("/me")
-def me(user=Depends(get_current_user)) -> dict:
-    return get_user_profile(user_id=user.sub)
+async def me(user=Depends(get_current_user), db: AsyncSession = Depends(get_unit_of_work)) -> dict:
+    return await get_user_profile(db, user_id=user.sub)
 
 
@@ -1,16 +1,21 @@
 from fastapi import APIRouter, Depends
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from ..schemas.wallet import WalletLinkRequest
 from ..services.wallet_service import link_wallet_to_user
 from ..services.auth import get_current_user
+from ..db.session import get_unit_of_work
 
 
 router = APIRouter(tags=["wallet"])
 
 
 @router.post("/link")
-def link_wallet(req: WalletLinkRequest, user=Depends(get_current_user)) -> dict:
-    link_wallet_to_user(
+async def link_wallet(
+    req: WalletLinkRequest, user=Depends(get_current_user), db: AsyncSession = Depends(get_unit_of_work)
+) -> dict:
+    await link_wallet_to_user(
+        db,
         user_id=user.sub,
         wallet_address=req.wallet_address,
         google_access_token=req.google_access_token,
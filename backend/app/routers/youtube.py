@@ -1,28 +1,73 @@
-from typing import List
+from datetime import datetime, timedelta
+from typing import List, Literal, Optional
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from ..schemas.youtube import VideoAddRequest, VideoResponse
+from ..schemas.youtube import (
+    VideoAddRequest,
+    VideoBulkAddRequest,
+    VideoBulkAddResponse,
+    VideoResponse,
+    VideoStatsSeriesResponse,
+)
 from ..services.youtube_service import (
     add_video_for_user,
+    add_videos_for_user,
     get_user_videos,
 )
+from ..services.video_stats import get_video_stats_series, naive_utc
 from ..services.auth import get_current_user
+from ..db.session import get_unit_of_work
+from ..utils.youtube_quota import QuotaExhaustedError
 
 
 router = APIRouter(tags=["youtube"])
 
 
 @router.post("/videos")
-def add_video(req: VideoAddRequest, user=Depends(get_current_user)) -> dict:
+async def add_video(
+    req: VideoAddRequest, user=Depends(get_current_user), db: AsyncSession = Depends(get_unit_of_work)
+) -> dict:
     try:
-        return add_video_for_user(user_id=user.sub, video_url=str(req.video_url))
+        return await add_video_for_user(db, user_id=user.sub, video_url=str(req.video_url))
+    except QuotaExhaustedError as e:
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=str(e))
+
+
+@router.post("/videos/bulk", response_model=VideoBulkAddResponse)
+async def add_videos_bulk(
+    req: VideoBulkAddRequest, user=Depends(get_current_user), db: AsyncSession = Depends(get_unit_of_work)
+):
+    try:
+        return await add_videos_for_user(db, user_id=user.sub, video_urls=req.video_urls)
+    except QuotaExhaustedError as e:
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail=str(e))
     except ValueError as e:
         raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=str(e))
 
 
 @router.get("/videos", response_model=List[VideoResponse])
-def list_videos(user=Depends(get_current_user)):
-    return get_user_videos(user_id=user.sub)
+async def list_videos(user=Depends(get_current_user), db: AsyncSession = Depends(get_unit_of_work)):
+    return await get_user_videos(db, user_id=user.sub)
 
 
+@router.get("/videos/{video_id}/stats", response_model=VideoStatsSeriesResponse)
+async def video_stats(
+    video_id: int,
+    start: Optional[datetime] = Query(None, description="UTC, defaults to 7 days before end"),
+    end: Optional[datetime] = Query(None, description="UTC, defaults to now"),
+    granularity: Optional[Literal["hour", "day"]] = Query(None, description="Picked from the range when omitted"),
+    user=Depends(get_current_user),
+    db: AsyncSession = Depends(get_unit_of_work),
+):
+    end = naive_utc(end) if end else datetime.utcnow()
+    start = naive_utc(start) if start else end - timedelta(days=7)
+    try:
+        return await get_video_stats_series(db, user.sub, video_id, start, end, granularity)
+    except LookupError as e:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=str(e))
@@ -1,4 +1,6 @@
-from pydantic import BaseModel
+from typing import Any, List, Optional
+
+from pydantic import BaseModel, Field
 
 
 class PoolCreateRequest(BaseModel):
@@ -16,3 +18,21 @@ class PoolCreateResponse(BaseModel):
     message: str = "pool created"
 
 
+MAX_BULK_POOLS = 100
+
+
+class PoolBulkCreateRequest(BaseModel):
+    # Plain objects: a malformed item is reported in its own result, not as a 422 for the batch
+    pools: List[Any] = Field(..., min_length=1, max_length=MAX_BULK_POOLS)
+
+
+class PoolBulkCreateResult(BaseModel):
+    index: int
+    pool_id: Optional[str] = None
+    error: Optional[str] = None
+
+
+class PoolBulkCreateResponse(BaseModel):
+    results: List[PoolBulkCreateResult]
+    submitted: int
+    message: str = "submitted"
@@ -1,11 +1,36 @@
+from datetime import datetime
 from typing import Optional, Literal
-from pydantic import BaseModel, AnyUrl
+from pydantic import BaseModel, AnyUrl, Field
 
 
 class VideoAddRequest(BaseModel):
     video_url: AnyUrl
 
 
+# Upper bound on URLs per bulk import request
+MAX_BULK_VIDEO_URLS = 200
+
+
+class VideoBulkAddRequest(BaseModel):
+    # Plain strings: a malformed URL is reported in its own result, not as a 422 for the batch
+    video_urls: list[str] = Field(min_length=1, max_length=MAX_BULK_VIDEO_URLS)
+
+
+class VideoBulkAddResult(BaseModel):
+    video_url: str
+    status: Literal['added', 'duplicate', 'invalid_url', 'not_found', 'channel_mismatch']
+    id: Optional[int] = None
+    likes: Optional[int] = None
+    views: Optional[int] = None
+
+
+class VideoBulkAddResponse(BaseModel):
+    added: int
+    results: list[VideoBulkAddResult]
+    subscribers: int
+    channel_id: str
+
+
 class VideoResponse(BaseModel):
     id: int
     video_url: AnyUrl
@@ -15,6 +40,23 @@ class VideoResponse(BaseModel):
     subscribers_current: int | None = None
     channel_id: Optional[str] = None
     channel_title: Optional[str] = None
+    # When likes/views/subscribers_current were last pulled from YouTube
+    last_refreshed_at: Optional[datetime] = None
+
+
+class VideoStatPoint(BaseModel):
+    bucket_start: datetime
+    views: int
+    likes: int
+    subscribers: Optional[int] = None
+
+
+class VideoStatsSeriesResponse(BaseModel):
+    video_id: int
+    granularity: Literal['hour', 'day']
+    points: list[VideoStatPoint]
+    views_gained: int
+    likes_gained: int
 
 
 class UserTypeSetRequest(BaseModel):
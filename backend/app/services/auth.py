@@ -1,13 +1,18 @@
-from dataclasses import dataclass
+from dataclasses import dataclass, replace
+import hashlib
 import logging
-from functools import lru_cache
+import time
 from typing import Any, Dict, Optional
 import jwt
 from fastapi import Depends, HTTPException, status, Header
 from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
-from jwt import PyJWKClient
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from ..core.config import settings
+from ..db.session import get_unit_of_work
+from ..utils.ttl_cache import TTLCache
+from .jwks import signing_key_for_token
+from .user_resolver import ResolvedUser, resolve_user
 
 
 security = HTTPBearer(auto_error=False)
@@ -18,16 +23,13 @@ logger = logging.getLogger("auth")
 class AuthenticatedUser:
     sub: str
     claims: Dict[str, Any]
+    # Filled in by get_principal
+    user_id: Optional[int] = None
+    role: Optional[str] = None
 
 
-@lru_cache(maxsize=1)
-def get_jwk_client() -> PyJWKClient:
-    return PyJWKClient(settings.clerk_jwks_url)
-
-
-def verify_and_decode_token(token: str) -> Dict[str, Any]:
-    jwk_client = get_jwk_client()
-    signing_key = jwk_client.get_signing_key_from_jwt(token).key
+def _decode_token(token: str) -> Dict[str, Any]:
+    signing_key = signing_key_for_token(token)
     decode_kwargs: Dict[str, Any] = {
         "algorithms": ["RS256"],
         "issuer": settings.clerk_issuer,
@@ -39,6 +41,40 @@ def verify_and_decode_token(token: str) -> Dict[str, Any]:
     return decoded
 
 
+# sha256(token) -> decoded claims, or (exception type, args) for a rejected token.
+# Keyed by digest so raw tokens are never held in memory as cache keys.
+token_cache: TTLCache = TTLCache(maxsize=settings.jwt_cache_size, ttl=settings.jwt_cache_ttl_seconds)
+token_cache_stats = {"verified": 0, "rejected": 0, "negative_hits": 0}
+
+
+def verify_and_decode_token(token: str) -> Dict[str, Any]:
+    """Verified claims are cached until min(exp, JWT_CACHE_TTL_SECONDS) so a session
+    token is signature-checked once, not on every request. Invalid tokens are
+    remembered for JWT_NEGATIVE_CACHE_TTL_SECONDS; JWKS lookup failures are not."""
+    key = hashlib.sha256(token.encode()).digest()
+    cached = token_cache.get(key)
+    if isinstance(cached, tuple):
+        token_cache_stats["negative_hits"] += 1
+        exc_type, args = cached
+        raise exc_type(*args)
+    if cached is not None:
+        return cached
+    try:
+        claims = _decode_token(token)
+    except jwt.InvalidTokenError as e:
+        token_cache_stats["rejected"] += 1
+        token_cache.set(key, (type(e), e.args), ttl=settings.jwt_negative_cache_ttl_seconds)
+        raise
+    token_cache_stats["verified"] += 1
+    ttl = float(settings.jwt_cache_ttl_seconds)
+    exp = claims.get("exp")
+    if isinstance(exp, (int, float)):
+        ttl = min(ttl, exp - time.time())
+    if ttl > 0:
+        token_cache.set(key, claims, ttl=ttl)
+    return claims
+
+
 def get_current_user(
     credentials: HTTPAuthorizationCredentials = Depends(security),
     x_test_user_id: Optional[str] = Header(None)
@@ -65,3 +101,40 @@ def get_current_user(
     return AuthenticatedUser(sub=sub, claims=claims)
 
 
+async def get_principal(
+    user: AuthenticatedUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_unit_of_work),
+) -> AuthenticatedUser:
+    """get_current_user plus the DB user id and upper-cased role, served from the
+    user cache (kept current by set_user_type) so role checks cost no query."""
+    return _with_user(user, await resolve_user(user.sub, db))
+
+
+def _with_user(user: AuthenticatedUser, resolved: ResolvedUser) -> AuthenticatedUser:
+    return replace(user, user_id=resolved.id, role=(resolved.user_type or "").upper() or None)
+
+
+def require_role(*roles: str):
+    """Dependency that returns the principal, or 403s unless its role is one of ``roles``.
+
+    The cached role may predate a change made on another worker, so a refusal is
+    re-checked once against the database before it is sent.
+    """
+    allowed = {r.upper() for r in roles}
+    detail = f"Only {' or '.join(roles)} can access this endpoint"
+
+    async def dependency(
+        principal: AuthenticatedUser = Depends(get_principal),
+        db: AsyncSession = Depends(get_unit_of_work),
+    ) -> AuthenticatedUser:
+        if principal.role not in allowed:
+            principal = _with_user(principal, await resolve_user(principal.sub, db, fresh=True))
+            if principal.role not in allowed:
+                raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail=detail)
+        return principal
+
+    return dependency
+
+
+require_kol = require_role("KOL")
+require_advertiser = require_role("ADVERTISER")
@@ -0,0 +1,103 @@
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, Optional
+
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from ..core.config import settings
+from ..db.models import ChannelStats
+from ..db.session import release_connection
+from ..utils.ttl_cache import TTLCache
+from ..utils.youtube_client import fetch_channel_stats_async, fetch_channels_stats_batch
+
+
+# youtube_channel_id -> {"subscriberCount": n}; subscriber counts move slowly and
+# many videos share a channel, so one fetch serves every add/refresh within the TTL
+channel_stats_cache: TTLCache = TTLCache(
+    maxsize=settings.channel_stats_cache_size, ttl=settings.channel_stats_ttl_seconds
+)
+
+
+def _load_persisted(db: Session, channel_ids: list) -> Dict[str, Dict[str, int]]:
+    if not settings.channel_stats_persist or not channel_ids:
+        return {}
+    cutoff = datetime.utcnow() - timedelta(seconds=settings.channel_stats_ttl_seconds)
+    rows = (
+        db.query(ChannelStats)
+        .filter(ChannelStats.channel_id.in_(channel_ids), ChannelStats.fetched_at >= cutoff)
+        .all()
+    )
+    found = {}
+    for row in rows:
+        stats = {"subscriberCount": row.subscriber_count}
+        # Only keep it in memory for what is left of its TTL
+        remaining = settings.channel_stats_ttl_seconds - (datetime.utcnow() - row.fetched_at).total_seconds()
+        channel_stats_cache.set(row.channel_id, stats, ttl=remaining)
+        found[row.channel_id] = stats
+    return found
+
+
+def _store(db: Session, fetched: Dict[str, Dict[str, int]]) -> None:
+    now = datetime.utcnow()
+    for channel_id, stats in fetched.items():
+        channel_stats_cache.set(channel_id, stats)
+    if not settings.channel_stats_persist or not fetched:
+        return
+    # Upsert: two requests may fetch the same new channel at once. Sorted so
+    # concurrent batches lock rows in the same order.
+    stmt = insert(ChannelStats).values(
+        [
+            {"channel_id": channel_id, "subscriber_count": fetched[channel_id]["subscriberCount"], "fetched_at": now}
+            for channel_id in sorted(fetched)
+        ]
+    )
+    db.execute(
+        stmt.on_conflict_do_update(
+            index_elements=[ChannelStats.channel_id],
+            set_={"subscriber_count": stmt.excluded.subscriber_count, "fetched_at": stmt.excluded.fetched_at},
+        )
+    )
+
+
+def get_channel_stats(db: Session, channel_ids: Iterable[Optional[str]]) -> Dict[str, Dict[str, int]]:
+    """Read-through lookup: memory, then the channel_stats table, then one batched
+    channels.list call for whatever is still missing. Caller commits."""
+    wanted = list(dict.fromkeys(c for c in channel_ids if c))
+    result: Dict[str, Dict[str, int]] = {}
+    for channel_id in wanted:
+        stats = channel_stats_cache.get(channel_id)
+        if stats is not None:
+            result[channel_id] = stats
+    missing = [c for c in wanted if c not in result]
+    result.update(_load_persisted(db, missing))
+    missing = [c for c in missing if c not in result]
+    if missing:
+        fetched = fetch_channels_stats_batch(settings.youtube_api_key, missing)
+        _store(db, fetched)
+        result.update(fetched)
+    return result
+
+
+async def get_channel_stats_async(db: AsyncSession, channel_id: str) -> Dict[str, int]:
+    """Single-channel get_channel_stats for the request path; a fetched value is
+    written through ``db``'s unit of work, and no connection is held during the fetch."""
+    stats = channel_stats_cache.get(channel_id)
+    if stats is not None:
+        return stats
+    if settings.channel_stats_persist:
+        stats = (await db.run_sync(_load_persisted, [channel_id])).get(channel_id)
+        await release_connection(db)
+        if stats is not None:
+            return stats
+    stats = await fetch_channel_stats_async(settings.youtube_api_key, channel_id)
+    await db.run_sync(_store, {channel_id: stats})
+    return stats
+
+
+def cached_subscribers(channel_id: Optional[str]) -> Optional[int]:
+    """Warm in-memory value only; never touches the DB or YouTube."""
+    if not channel_id:
+        return None
+    stats = channel_stats_cache.peek(channel_id)
+    return stats["subscriberCount"] if stats is not None else None
@@ -3,25 +3,39 @@ from typing import Optional
 import httpx
 
 from ..core.config import settings
+from ..utils.http_client import get_async_http_client, get_http_client
+
+
+def _google_token_url(user_id: str) -> str:
+    return f"{settings.clerk_api_base_url}/users/{user_id}/oauth_access_tokens/oauth_google"
+
+
+def _parse_google_token(resp: httpx.Response) -> Optional[str]:
+    if resp.status_code != 200:
+        return None
+    data = resp.json()
+    # data is array of tokens, pick the first (most recent)
+    if isinstance(data, list) and data:
+        token_obj = data[0]
+        return token_obj.get("token")
+    return None
 
 
 def get_google_access_token_for_user(user_id: str) -> Optional[str]:
     if not settings.clerk_secret_key:
         return None
-    url = f"https://api.clerk.com/v1/users/{user_id}/oauth_access_tokens/oauth_google"
     headers = {"Authorization": f"Bearer {settings.clerk_secret_key}"}
     try:
-        with httpx.Client(timeout=10) as client:
-            resp = client.get(url, headers=headers)
-            if resp.status_code != 200:
-                return None
-            data = resp.json()
-            # data is array of tokens, pick the first (most recent)
-            if isinstance(data, list) and data:
-                token_obj = data[0]
-                return token_obj.get("token")
-            return None
+        return _parse_google_token(get_http_client().get(_google_token_url(user_id), headers=headers))
     except Exception:
         return None
 
 
+async def get_google_access_token_for_user_async(user_id: str) -> Optional[str]:
+    if not settings.clerk_secret_key:
+        return None
+    headers = {"Authorization": f"Bearer {settings.clerk_secret_key}"}
+    try:
+        return _parse_google_token(await get_async_http_client().get(_google_token_url(user_id), headers=headers))
+    except Exception:
+        return None
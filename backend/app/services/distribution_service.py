@@ -0,0 +1,136 @@
+"""Per-epoch distribution records: COPY-based bulk loading and streaming reads.
+
+Load a CSV of ``account,shares,amount`` rows for one pool epoch with::
+
+    python -m app.services.distribution_service POOL_ID EPOCH distribution.csv [--header]
+
+Loading replaces the epoch's rows atomically. Leaf indexes are assigned by
+account in byte order, the same order ``sorted()`` gives the Merkle builder.
+"""
+import argparse
+import logging
+import time
+from typing import IO, Callable, Iterable, Iterator, List, Optional, Tuple
+
+import psycopg
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from ..db.models import Distribution
+from ..db.session import get_engine
+from ..utils.merkle_utils import generate_merkle_proof
+
+
+logger = logging.getLogger("distribution")
+
+COPY_CHUNK_BYTES = 1 << 20
+
+_STAGE_DDL = (
+    "CREATE TEMP TABLE _distribution_stage "
+    "(account text, shares numeric(78, 0), amount numeric(78, 0)) ON COMMIT DROP"
+)
+_STAGE_COPY = "COPY _distribution_stage (account, shares, amount) FROM STDIN"
+
+# COLLATE "C" ranks by bytes, independent of the database's locale
+_PROMOTE_SQL = """
+    INSERT INTO distributions (pool_id, epoch, index, account, shares, amount)
+    SELECT %s, %s, row_number() OVER (ORDER BY account COLLATE "C") - 1, account, shares, amount
+    FROM _distribution_stage
+"""
+
+
+def _load(pool_id: int, epoch: int, feed: Callable[[psycopg.Cursor], None]) -> int:
+    """COPY into a temp staging table, then replace the epoch's rows from it in one transaction."""
+    raw = get_engine().raw_connection()
+    try:
+        with raw.driver_connection.cursor() as cur:
+            cur.execute(_STAGE_DDL)
+            feed(cur)
+            cur.execute("DELETE FROM distributions WHERE pool_id = %s AND epoch = %s", (pool_id, epoch))
+            cur.execute(_PROMOTE_SQL, (pool_id, epoch))
+            count = cur.rowcount
+        raw.commit()
+        return count
+    except psycopg.errors.UniqueViolation:
+        raw.rollback()
+        raise ValueError(f"Duplicate account in distribution for pool {pool_id} epoch {epoch}")
+    except Exception:
+        raw.rollback()
+        raise
+    finally:
+        raw.close()
+
+
+def load_distribution(pool_id: int, epoch: int, records: Iterable[Tuple[str, int, int]]) -> int:
+    """Load ``(account, shares, amount)`` tuples; returns the number of rows stored."""
+
+    def feed(cur: psycopg.Cursor) -> None:
+        with cur.copy(_STAGE_COPY) as copy:
+            for record in records:
+                copy.write_row(record)
+
+    return _load(pool_id, epoch, feed)
+
+
+def load_distribution_csv(pool_id: int, epoch: int, stream: IO[bytes], header: bool = False) -> int:
+    """Load raw CSV bytes straight into COPY without parsing them in Python."""
+    options = "FORMAT csv, HEADER true" if header else "FORMAT csv"
+
+    def feed(cur: psycopg.Cursor) -> None:
+        with cur.copy(f"{_STAGE_COPY} WITH ({options})") as copy:
+            while chunk := stream.read(COPY_CHUNK_BYTES):
+                copy.write(chunk)
+
+    return _load(pool_id, epoch, feed)
+
+
+def iter_distribution(db: Session, pool_id: int, epoch: int, batch_size: int = 10_000) -> Iterator[dict]:
+    """Yield the epoch's records in leaf order through a server-side cursor."""
+    stmt = (
+        select(Distribution.account, Distribution.shares, Distribution.amount)
+        .where(Distribution.pool_id == pool_id, Distribution.epoch == epoch)
+        .order_by(Distribution.index)
+        .execution_options(yield_per=batch_size)
+    )
+    for row in db.execute(stmt):
+        yield {"account": row.account, "shares": int(row.shares), "amount": int(row.amount)}
+
+
+def get_distribution_entry(db: Session, pool_id: int, epoch: int, account: str) -> Optional[dict]:
+    row = db.execute(
+        select(Distribution.index, Distribution.shares, Distribution.amount).where(
+            Distribution.pool_id == pool_id, Distribution.epoch == epoch, Distribution.account == account
+        )
+    ).one_or_none()
+    if row is None:
+        return None
+    return {"index": row.index, "account": account, "shares": int(row.shares), "amount": int(row.amount)}
+
+
+def get_merkle_proof(db: Session, pool_id: int, epoch: int, account: str) -> Tuple[dict, List[str], str]:
+    """The account's entry with its proof and leaf; ValueError if it is not in the epoch.
+    Streams the whole epoch, so run it off the event loop."""
+    entry = get_distribution_entry(db, pool_id, epoch, account)
+    if entry is None:
+        raise ValueError(f"Account {account} not in pool {pool_id} epoch {epoch}")
+    proof, leaf = generate_merkle_proof(pool_id, epoch, entry, iter_distribution(db, pool_id, epoch))
+    return entry, proof, leaf
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Load an epoch's distribution from a CSV file")
+    parser.add_argument("pool_id", type=int)
+    parser.add_argument("epoch", type=int)
+    parser.add_argument("csv_path", help="account,shares,amount rows")
+    parser.add_argument("--header", action="store_true", help="skip the first line")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+
+    start = time.perf_counter()
+    with open(args.csv_path, "rb") as f:
+        count = load_distribution_csv(args.pool_id, args.epoch, f, header=args.header)
+    print(f"loaded {count} rows for pool {args.pool_id} epoch {args.epoch} in {time.perf_counter() - start:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+import logging
+import threading
+import time
+from typing import Dict, Optional
+
+import jwt
+from jwt import PyJWK, PyJWKClientError, PyJWKSet
+
+from ..core.config import settings
+from ..utils.background import PeriodicJob
+from ..utils.http_client import get_http_client
+
+
+logger = logging.getLogger("auth")
+
+
+class JWKSManager:
+    """Clerk signing keys indexed by ``kid``.
+
+    Keys are prefetched and refreshed by a background job, so requests normally
+    never wait on Clerk. An unknown kid (key rotation) triggers one fetch shared by
+    every request that hits it; a failed fetch keeps the last known good keys.
+    """
+
+    def __init__(self) -> None:
+        self._keys: Dict[str, PyJWK] = {}
+        self._lock = threading.Lock()
+        self._generation = 0
+        self._last_attempt = 0.0
+        self._fetched_at: Optional[float] = None
+        self._last_ok = True
+        self.refreshes = 0
+        self.failures = 0
+        self.miss_fetches = 0
+        self.last_error: Optional[str] = None
+
+    def _fetch(self) -> Dict[str, PyJWK]:
+        res = get_http_client().get(settings.clerk_jwks_url, timeout=settings.jwks_fetch_timeout_seconds)
+        res.raise_for_status()
+        return {k.key_id: k for k in PyJWKSet.from_dict(res.json()).keys if k.key_id}
+
+    def _refresh_locked(self) -> bool:
+        self._last_attempt = time.monotonic()
+        try:
+            keys = self._fetch()
+        except Exception as e:
+            self.failures += 1
+            self._last_ok = False
+            self.last_error = (str(e).splitlines() or [type(e).__name__])[0]
+            logger.warning("JWKS refresh failed, keeping %d cached keys: %s", len(self._keys), self.last_error)
+            return False
+        self._keys = keys
+        self._generation += 1
+        self._fetched_at = time.monotonic()
+        self._last_ok = True
+        self.refreshes += 1
+        return True
+
+    def refresh(self) -> None:
+        with self._lock:
+            self._refresh_locked()
+
+    def next_refresh_in(self) -> float:
+        return settings.jwks_refresh_interval_seconds if self._last_ok else settings.jwks_retry_interval_seconds
+
+    def get_signing_key(self, kid: str) -> PyJWK:
+        key = self._keys.get(kid)
+        if key is not None:
+            return key
+        generation = self._generation
+        with self._lock:
+            key = self._keys.get(kid)
+            # Skip the fetch if another request refreshed while we waited for the
+            # lock, or one ran recently (unknown kids must not hammer Clerk)
+            if (
+                key is None
+                and self._generation == generation
+                and time.monotonic() - self._last_attempt >= settings.jwks_min_miss_refresh_seconds
+            ):
+                self.miss_fetches += 1
+                self._refresh_locked()
+                key = self._keys.get(kid)
+        if key is None:
+            raise PyJWKClientError(f'Unable to find a signing key that matches: "{kid}"')
+        return key
+
+    def snapshot(self) -> dict:
+        return {
+            "keys": len(self._keys),
+            "age_seconds": round(time.monotonic() - self._fetched_at, 1) if self._fetched_at is not None else None,
+            "refreshes": self.refreshes,
+            "failures": self.failures,
+            "miss_fetches": self.miss_fetches,
+            "last_error": self.last_error if not self._last_ok else None,
+        }
+
+
+jwks = JWKSManager()
+
+jwks_refresh_job = PeriodicJob("jwks_refresh", jwks.refresh, jwks.next_refresh_in)
+
+
+def start_jwks_refresher() -> None:
+    # The first run happens right away: the startup prefetch
+    jwks_refresh_job.start()
+
+
+async def stop_jwks_refresher() -> None:
+    await jwks_refresh_job.stop()
+
+
+def signing_key_for_token(token: str):
+    kid = jwt.get_unverified_header(token).get("kid")
+    if not kid:
+        raise jwt.DecodeError("Token header has no kid")
+    return jwks.get_signing_key(kid).key
@@ -0,0 +1,123 @@
+import asyncio
+import json
+import logging
+import time
+from typing import Dict, List, Optional, Set
+
+import psycopg
+from sqlalchemy import text
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..core.config import settings
+
+
+logger = logging.getLogger("pool_events")
+
+CHANNEL = "pool_events"
+
+
+class PoolEventBus:
+    """Pool status changes, relayed to every worker through Postgres LISTEN/NOTIFY.
+
+    Events carry only ``{pool_id, status}`` and are sent after the status change
+    has committed; readers that need more re-read the row. Each worker's listener
+    connection receives every event (its own included), bumps ``version`` and
+    passes the event to the streams watching that pool.
+    """
+
+    def __init__(self) -> None:
+        self.version = 0
+        self.bumped_at = 0.0
+        self.connected = False
+        self.received = 0
+        self.reconnects = 0
+        # pool id -> queues of the streams watching it
+        self._watchers: Dict[int, Set[asyncio.Queue]] = {}
+        self._task: Optional[asyncio.Task] = None
+
+    def bump(self) -> None:
+        self.version += 1
+        self.bumped_at = time.monotonic()
+
+    def watch(self, pool_id: int) -> asyncio.Queue:
+        """Queue that receives this pool's events; pair with ``unwatch``."""
+        queue: asyncio.Queue = asyncio.Queue(maxsize=16)
+        self._watchers.setdefault(pool_id, set()).add(queue)
+        return queue
+
+    def unwatch(self, pool_id: int, queue: asyncio.Queue) -> None:
+        queues = self._watchers.get(pool_id)
+        if queues is not None:
+            queues.discard(queue)
+            if not queues:
+                del self._watchers[pool_id]
+
+    def _dispatch(self, event: dict) -> None:
+        self.bump()
+        for queue in self._watchers.get(event.get("pool_id"), ()):
+            try:
+                queue.put_nowait(event)
+            except asyncio.QueueFull:
+                pass
+
+    async def _listen_forever(self) -> None:
+        conninfo = make_url(settings.database_url).set(drivername="postgresql").render_as_string(hide_password=False)
+        while True:
+            try:
+                async with await psycopg.AsyncConnection.connect(conninfo, autocommit=True) as conn:
+                    await conn.execute(f"LISTEN {CHANNEL}")
+                    self.connected = True
+                    # Events sent while we were not listening are lost; treat everything as changed
+                    self.bump()
+                    async for notify in conn.notifies():
+                        self.received += 1
+                        try:
+                            event = json.loads(notify.payload)
+                        except ValueError:
+                            continue
+                        self._dispatch(event)
+            except Exception as e:
+                logger.warning("pool event listener disconnected: %s", e)
+            finally:
+                self.connected = False
+            self.reconnects += 1
+            await asyncio.sleep(settings.pool_events_reconnect_seconds)
+
+    def start(self) -> None:
+        if settings.pool_events_enabled and self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self._listen_forever())
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    def snapshot(self) -> dict:
+        return {
+            "connected": self.connected,
+            "version": self.version,
+            "received": self.received,
+            "reconnects": self.reconnects,
+            "watched_pools": len(self._watchers),
+            "watchers": sum(len(q) for q in self._watchers.values()),
+        }
+
+
+pool_events = PoolEventBus()
+
+
+_NOTIFY_SQL = text(f"SELECT pg_notify('{CHANNEL}', e) FROM unnest(CAST(:events AS text[])) AS e")
+
+
+async def publish_pool_events(db: AsyncSession, events: List[dict]) -> None:
+    """Queue ``events`` on ``db``'s transaction (one statement); workers receive
+    them once that commits. Keep events small: a payload over ~8000 bytes fails."""
+    if events:
+        await db.execute(_NOTIFY_SQL, {"events": [json.dumps(e) for e in events]})
+
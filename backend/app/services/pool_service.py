@@ -1,15 +1,30 @@
+import hashlib
+import json
+import logging
+import time
 from datetime import datetime
-from typing import Tuple, Optional
+from typing import Any, Awaitable, Callable, List, Optional, Tuple
 
-from sqlalchemy.orm import Session
+from sqlalchemy import Integer, column, func, insert, literal, literal_column, select, tuple_, update, values
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from ..db.models import Pool, User
-from .youtube_service import get_or_create_user_by_sub
-from ..db.session import get_db_session
-from .starknet_client import create_pool_on_chain
+from ..core.config import settings
+from ..db import routing
+from ..db.models import POOL_SEARCH_DOCUMENT, Pool
+from ..db.routing import note_write, read_session
+from ..db.session import async_session
+from ..utils.ttl_cache import TTLCache
+from .auth import AuthenticatedUser
+from .pool_events import pool_events, publish_pool_events
+from .starknet_client import create_pool_on_chain, create_pools_on_chain
+from .user_resolver import resolve_user
 
 
-def create_pool_db_then_chain(
+logger = logging.getLogger("pool_service")
+
+
+async def create_pool_db_then_chain(
+    db: AsyncSession,
     token: str,
     brand: str,
     deadline_ts: int,
@@ -19,117 +34,379 @@ def create_pool_db_then_chain(
     task_title: str | None = None,
     description: str | None = None,
 ) -> str:
-    # Persist first
-    with next(get_db_session()) as db:  # type: ignore
-        # Resolve user id by Clerk sub
-        u = get_or_create_user_by_sub(db, creator_sub)
-        pool = Pool(
-            brand=brand,
-            token=token,
-            task_title=task_title,
-            description=description,
-            attester_pubkey=str(attester_pubkey),
-            deadline_ts=deadline_ts,
-            refund_after_ts=refund_after_ts,
-            status="submitted",
-            created_at=datetime.utcnow(),
-            user_id=u.id,
-        )
-        db.add(pool)
-        db.commit()
-        db.refresh(pool)
-
-        # Mirror DB primary key to on-chain pool_id field for consistency
-        if pool.pool_id is None:
-            pool.pool_id = pool.id
-            db.add(pool)
-            db.commit()
-
-        # derive a numeric pool_id (simple: db id)
-        return str(pool.id)
-
-
-def get_pool_status(pool_id: int) -> dict:
-    with next(get_db_session()) as db:  # type: ignore
-        pool = db.query(Pool).filter(Pool.id == pool_id).first()
-        if not pool:
-            return {"error": "not found"}
-        return {
-            "pool_id": str(pool.id),
-            "status": pool.status,
-            "tx_hash": pool.tx_hash,
-            "error": pool.error_message,
-        }
+    # Resolve user id by Clerk sub
+    u = await resolve_user(creator_sub, db)
+    # Draw the id from the serial sequence once so the on-chain pool_id mirrors the
+    # DB primary key in the same INSERT
+    new_id = select(func.nextval(func.pg_get_serial_sequence("pools", "id")).label("id")).cte("new_id")
+    fields = {
+        "brand": brand,
+        "token": token,
+        "task_title": task_title,
+        "description": description,
+        "attester_pubkey": str(attester_pubkey),
+        "deadline_ts": deadline_ts,
+        "refund_after_ts": refund_after_ts,
+        "status": "submitted",
+        "created_at": datetime.utcnow(),
+        "user_id": u.id,
+    }
+    stmt = insert(Pool).from_select(
+        ["id", "pool_id", *fields],
+        select(
+            new_id.c.id,
+            new_id.c.id,
+            *(literal(v, Pool.__table__.c[k].type) for k, v in fields.items()),
+        ),
+    ).returning(Pool.id)
+    pool_id = (await db.execute(stmt)).scalar_one()
+    note_write(db, creator_sub)
+    return str(pool_id)
+
+
+async def _pool_status(db: AsyncSession, pool_id: int) -> dict:
+    pool = (
+        await db.execute(select(Pool.id, Pool.status, Pool.tx_hash, Pool.error_message).where(Pool.id == pool_id))
+    ).one_or_none()
+    if not pool:
+        return {"error": "not found"}
+    return {
+        "pool_id": str(pool.id),
+        "status": pool.status,
+        "tx_hash": pool.tx_hash,
+        "error": pool.error_message,
+    }
 
 
-def process_pool_creation(pool_id: int, token: str, brand: str, deadline_ts: int, refund_after_ts: int, attester_pubkey: int) -> None:
+async def get_pool_status(db: AsyncSession, pool_id: int, user_sub: Optional[str] = None, fresh: bool = False) -> dict:
+    """``fresh`` reads the primary, never a lagging replica."""
+    if fresh:
+        return await _pool_status(db, pool_id)
+    async with read_session(user_sub, primary=db) as rdb:
+        return await _pool_status(rdb, pool_id)
+
+
+async def _record_chain_result(pool_ids: List[int], result: dict) -> None:
+    async with async_session() as db:
+        await db.execute(update(Pool).where(Pool.id.in_(pool_ids)).values(**result))
+        await db.commit()
+    # Separate transaction: a failed notify must not undo the status. Missed events
+    # only delay other workers (listings expire, streams re-read on disconnect).
+    try:
+        async with async_session() as db:
+            await publish_pool_events(db, [{"pool_id": pool_id, "status": result["status"]} for pool_id in pool_ids])
+            await db.commit()
+    except Exception:
+        logger.exception("failed to publish status events for pools %s", pool_ids)
+    # Don't wait for our own notification to come back before serving fresh listings
+    pool_events.bump()
+
+
+async def process_pool_creation(pool_id: int, token: str, brand: str, deadline_ts: int, refund_after_ts: int, attester_pubkey: int) -> None:
+    # Runs after the response, outside the request's unit of work
     try:
         # send tx and wait
-        import anyio
-        tx_hash = anyio.run(create_pool_on_chain, pool_id, brand, token, attester_pubkey, deadline_ts, refund_after_ts)
-        with next(get_db_session()) as db:  # type: ignore
-            pool = db.query(Pool).filter(Pool.id == pool_id).first()
-            if pool:
-                pool.tx_hash = tx_hash
-                pool.status = "created"
-                db.add(pool)
-                db.commit()
+        tx_hash = await create_pool_on_chain(pool_id, brand, token, attester_pubkey, deadline_ts, refund_after_ts)
+        result = {"tx_hash": tx_hash, "status": "created"}
     except Exception as e:
-        with next(get_db_session()) as db:  # type: ignore
-            pool = db.query(Pool).filter(Pool.id == pool_id).first()
-            if pool:
-                pool.status = "failed"
-                pool.error_message = str(e)
-                db.add(pool)
-                db.commit()
-
-
-def list_pools_for_user(sub: str) -> list[dict]:
-    with next(get_db_session()) as db:  # type: ignore
-        user = db.query(User).filter(User.sub == sub).first()
-        if not user or (user.user_type or "").upper() != "ADVERTISER":
-            return []
-        pools = (
-            db.query(Pool)
-            .filter(Pool.user_id == user.id, Pool.status == "created")
-            .order_by(Pool.id.desc())
-            .all()
-        )
-        return [
-            {
-                "pool_id": p.pool_id or p.id,
-                "status": p.status,
-                "tx_hash": p.tx_hash,
-                "brand": p.brand,
-                "token": p.token,
-                "deadline_ts": p.deadline_ts,
-                "refund_after_ts": p.refund_after_ts,
-                "created_at": p.created_at.isoformat() if p.created_at else None,
-            }
-            for p in pools
-        ]
-
-
-def list_all_pools() -> list[dict]:
-    with next(get_db_session()) as db:  # type: ignore
-        pools = (
-            db.query(Pool)
-            .filter(Pool.status == "created")
-            .order_by(Pool.id.desc())
-            .all()
+        result = {"status": "failed", "error_message": str(e)}
+    await _record_chain_result([pool_id], result)
+
+
+# Per-item fields of a bulk create, in the order they are sent to the DB
+_BULK_ITEM_COLUMNS = ("brand", "token", "task_title", "description", "deadline_ts", "refund_after_ts")
+
+
+# pools.deadline_ts / refund_after_ts are INTEGER columns
+_MAX_POOL_TS = 2**31 - 1
+# Starknet contract addresses are felts below 2**251
+_ADDRESS_BOUND = 2**251
+
+
+def _invalid_pool_item(item: Any) -> Optional[str]:
+    """Why a bulk item can't be created, or None. One bad call reverts its whole
+    multicall, so reject what KolEscrow.create_pool asserts, and one bad row would
+    fail the single INSERT, so reject what the columns can't hold."""
+    if not isinstance(item, dict):
+        return "item must be an object"
+    for field in ("brand", "token"):
+        value = item.get(field)
+        if not isinstance(value, str):
+            return f"{field} is required"
+        try:
+            address = int(value, 16)
+        except ValueError:
+            return f"{field} is not a hex address"
+        if not 0 < address < _ADDRESS_BOUND:
+            return f"{field} is not a valid Starknet address"
+    for field in ("deadline_ts", "refund_after_ts"):
+        value = item.get(field)
+        if not isinstance(value, int) or isinstance(value, bool):
+            return f"{field} must be an integer"
+        if not 0 < value <= _MAX_POOL_TS:
+            return f"{field} must be between 1 and {_MAX_POOL_TS}"
+    if item["refund_after_ts"] <= item["deadline_ts"]:
+        return "refund_after_ts must be after deadline_ts"
+    for field in ("task_title", "description"):
+        if not isinstance(item.get(field, ""), (str, type(None))):
+            return f"{field} must be a string"
+    return None
+
+
+async def create_pools_bulk(
+    db: AsyncSession, principal: AuthenticatedUser, items: List[Any], attester_pubkey: int
+) -> Tuple[List[dict], List[tuple]]:
+    """Insert a submitted pool for every valid item (raw request objects) in one statement.
+
+    Returns a result per item (``pool_id`` or ``error``, in request order) and the
+    chain job arguments for process_bulk_pool_creation.
+    """
+    results: List[dict] = [{"index": i, "pool_id": None, "error": _invalid_pool_item(item)} for i, item in enumerate(items)]
+    valid = [(i, item) for i, item in enumerate(items) if results[i]["error"] is None]
+    if not valid:
+        return results, []
+    rows = values(
+        column("ord", Integer),
+        *(column(c, Pool.__table__.c[c].type) for c in _BULK_ITEM_COLUMNS),
+        name="items",
+    ).data([(i, *(item.get(c) for c in _BULK_ITEM_COLUMNS)) for i, item in valid])
+    # Referenced twice below; a CTE with nextval() is materialized, so each row draws one id
+    ids = select(func.nextval(func.pg_get_serial_sequence("pools", "id")).label("id"), *rows.c).cte("ids")
+    constants = {
+        "attester_pubkey": str(attester_pubkey),
+        "status": "submitted",
+        "created_at": datetime.utcnow(),
+        "user_id": principal.user_id,
+    }
+    inserted = (
+        insert(Pool)
+        .from_select(
+            ["id", "pool_id", *_BULK_ITEM_COLUMNS, *constants],
+            select(
+                ids.c.id,
+                ids.c.id,
+                *(ids.c[c] for c in _BULK_ITEM_COLUMNS),
+                *(literal(v, Pool.__table__.c[k].type) for k, v in constants.items()),
+            ),
         )
-        return [
-            {
-                "pool_id": p.pool_id or p.id,
-                "status": p.status,
-                "tx_hash": p.tx_hash,
-                "brand": p.brand,
-                "token": p.token,
-                "deadline_ts": p.deadline_ts,
-                "refund_after_ts": p.refund_after_ts,
-                "created_at": p.created_at.isoformat() if p.created_at else None,
-                "user_id": p.user_id,
-            }
-            for p in pools
-        ]
+        .returning(Pool.id)
+        .cte("inserted")
+    )
+    stmt = select(ids.c.ord, ids.c.id).join(inserted, inserted.c.id == ids.c.id)
+    new_ids = dict((await db.execute(stmt)).all())
+    note_write(db, principal.sub)
+    jobs = []
+    for i, item in valid:
+        results[i]["pool_id"] = str(new_ids[i])
+        jobs.append((new_ids[i], item["brand"], item["token"], attester_pubkey, item["deadline_ts"], item["refund_after_ts"]))
+    return results, jobs
+
+
+async def process_bulk_pool_creation(pools: List[tuple]) -> None:
+    """Chain job for a bulk create: create_pool calls go out in multicall transactions
+    of up to STARKNET_MAX_CALLS_PER_TX, so the pools of one batch succeed or fail together."""
+    size = settings.starknet_max_calls_per_tx
+    for start in range(0, len(pools), size):
+        batch = pools[start : start + size]
+        try:
+            tx_hash = await create_pools_on_chain(batch)
+            result = {"tx_hash": tx_hash, "status": "created"}
+        except Exception as e:
+            result = {"status": "failed", "error_message": str(e)}
+        ids = [p[0] for p in batch]
+        try:
+            await _record_chain_result(ids, result)
+        except Exception:
+            # Keep going: the remaining batches still need to be sent and recorded
+            logger.exception("failed to record %s for pools %s", result["status"], ids)
+
+
+# Listing page sizes; pages are keyset-paginated on id (newest first)
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+_LISTING_COLUMNS = (
+    Pool.id,
+    Pool.pool_id,
+    Pool.status,
+    Pool.tx_hash,
+    Pool.brand,
+    Pool.token,
+    Pool.deadline_ts,
+    Pool.refund_after_ts,
+    Pool.created_at,
+)
+
+
+def _page(rows: list, limit: int, with_user: bool = False) -> dict:
+    """Shape one page; ``rows`` holds up to ``limit + 1`` rows so we know if more exist."""
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    items = []
+    for r in rows:
+        item = {
+            "pool_id": r.pool_id or r.id,
+            "status": r.status,
+            "tx_hash": r.tx_hash,
+            "brand": r.brand,
+            "token": r.token,
+            "deadline_ts": r.deadline_ts,
+            "refund_after_ts": r.refund_after_ts,
+            "created_at": r.created_at.isoformat() if r.created_at else None,
+        }
+        if with_user:
+            item["user_id"] = r.user_id
+        items.append(item)
+    return {"items": items, "next_cursor": rows[-1].id if has_more else None}
+
+
+def _listing_query(columns: tuple, limit: int, cursor: Optional[int], *filters):
+    stmt = select(*columns).where(Pool.status == "created", *filters)
+    if cursor is not None:
+        stmt = stmt.where(Pool.id < cursor)
+    return stmt.order_by(Pool.id.desc()).limit(limit + 1)
+
+
+async def list_pools_for_user(
+    db: AsyncSession, principal: AuthenticatedUser, limit: int = DEFAULT_PAGE_SIZE, cursor: Optional[int] = None
+) -> dict:
+    """One page of the advertiser's created pools; pass ``next_cursor`` back as ``cursor``."""
+    if principal.role != "ADVERTISER":
+        return {"items": [], "next_cursor": None}
+    async with read_session(principal.sub, primary=db) as rdb:
+        rows = (
+            await rdb.execute(_listing_query(_LISTING_COLUMNS, limit, cursor, Pool.user_id == principal.user_id))
+        ).all()
+        return _page(rows, limit)
+
+
+async def list_all_pools(db: AsyncSession, limit: int = DEFAULT_PAGE_SIZE, cursor: Optional[int] = None) -> dict:
+    async with read_session(primary=db) as rdb:
+        rows = (await rdb.execute(_listing_query(_LISTING_COLUMNS + (Pool.user_id,), limit, cursor))).all()
+        return _page(rows, limit, with_user=True)
+
+
+# Fields a search can project; pool_id is always returned
+SEARCH_FIELDS = {
+    "status": Pool.status,
+    "tx_hash": Pool.tx_hash,
+    "brand": Pool.brand,
+    "token": Pool.token,
+    "task_title": Pool.task_title,
+    "description": Pool.description,
+    "deadline_ts": Pool.deadline_ts,
+    "refund_after_ts": Pool.refund_after_ts,
+    "created_at": Pool.created_at,
+    "user_id": Pool.user_id,
+}
+DEFAULT_SEARCH_FIELDS = ("brand", "token", "task_title", "deadline_ts", "refund_after_ts")
+# newest: id desc; deadline: soonest deadline first
+SEARCH_SORTS = ("newest", "deadline")
+
+
+def _search_cursor(sort: str, cursor: Optional[str]):
+    if cursor is None:
+        return None
+    try:
+        if sort == "newest":
+            return Pool.id < int(cursor)
+        deadline_ts, pool_id = (int(part) for part in cursor.split(":"))
+    except ValueError:
+        raise ValueError("Invalid cursor")
+    return tuple_(Pool.deadline_ts, Pool.id) > tuple_(deadline_ts, pool_id)
+
+
+async def search_pools(
+    db: AsyncSession,
+    q: Optional[str] = None,
+    brand: Optional[str] = None,
+    token: Optional[str] = None,
+    deadline_from: Optional[int] = None,
+    deadline_to: Optional[int] = None,
+    sort: str = "newest",
+    fields: Optional[List[str]] = None,
+    limit: int = DEFAULT_PAGE_SIZE,
+    cursor: Optional[str] = None,
+) -> dict:
+    """One page of created pools matching every given filter, with only ``fields``.
+
+    ``q`` is a web-search style keyword query over task_title and description.
+    Filtering, ordering and the limit run in SQL on the ix_pools_* indexes, so
+    the cost follows the number of matches, not the size of the table.
+    """
+    fields = list(dict.fromkeys(fields or DEFAULT_SEARCH_FIELDS))
+    unknown = [f for f in fields if f not in SEARCH_FIELDS]
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(unknown)}")
+    if sort not in SEARCH_SORTS:
+        raise ValueError(f"sort must be one of {', '.join(SEARCH_SORTS)}")
+
+    stmt = select(
+        Pool.id,
+        Pool.deadline_ts.label("_deadline_ts"),
+        func.coalesce(Pool.pool_id, Pool.id).label("pool_id"),
+        *(SEARCH_FIELDS[f].label(f) for f in fields),
+    ).where(Pool.status == "created")
+    if q and q.strip():
+        document = literal_column(POOL_SEARCH_DOCUMENT)
+        stmt = stmt.where(document.op("@@")(func.websearch_to_tsquery(literal_column("'english'::regconfig"), q)))
+    if brand is not None:
+        stmt = stmt.where(Pool.brand == brand)
+    if token is not None:
+        stmt = stmt.where(Pool.token == token)
+    if deadline_from is not None:
+        stmt = stmt.where(Pool.deadline_ts >= deadline_from)
+    if deadline_to is not None:
+        stmt = stmt.where(Pool.deadline_ts <= deadline_to)
+    after = _search_cursor(sort, cursor)
+    if after is not None:
+        stmt = stmt.where(after)
+    if sort == "newest":
+        stmt = stmt.order_by(Pool.id.desc())
+    else:
+        stmt = stmt.order_by(Pool.deadline_ts, Pool.id)
+
+    async with read_session(primary=db) as rdb:
+        rows = (await rdb.execute(stmt.limit(limit + 1))).all()
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    items = []
+    for r in rows:
+        item = {"pool_id": r.pool_id}
+        for f in fields:
+            value = getattr(r, f)
+            item[f] = value.isoformat() if f == "created_at" and value is not None else value
+        items.append(item)
+    next_cursor = None
+    if has_more:
+        last = rows[-1]
+        next_cursor = str(last.id) if sort == "newest" else f"{last._deadline_ts}:{last.id}"
+    return {"items": items, "next_cursor": next_cursor}
+
+
+# listing key -> (pool event version, ETag, JSON body). Listings only show pools in
+# "created" status and nothing else about a listed pool changes, so an entry stays
+# valid until the next pool status event.
+listing_cache: TTLCache = TTLCache(
+    maxsize=settings.pool_listing_cache_size, ttl=settings.pool_listing_cache_ttl_seconds
+)
+
 
+async def cached_listing(key: tuple, load: Callable[[], Awaitable[dict]]) -> Tuple[str, bytes]:
+    """Return (strong ETag, JSON body) for a listing page, running ``load`` only if
+    no page is cached for the current event version. The ETag hashes the body, so
+    every worker agrees on it."""
+    version = pool_events.version
+    entry = listing_cache.get(key)
+    if entry is not None and entry[0] == version:
+        return entry[1], entry[2]
+    body = json.dumps(await load(), separators=(",", ":")).encode()
+    etag = f'"{hashlib.sha256(body).hexdigest()[:32]}"'
+    # Without the listener this worker would miss other workers' changes
+    if pool_events.connected:
+        ttl = None
+        # The replica may not have the change behind the latest bump yet
+        if routing.replica_engine is not None and time.monotonic() - pool_events.bumped_at < settings.db_replica_max_lag_seconds:
+            ttl = settings.db_replica_max_lag_seconds
+        listing_cache.set(key, (version, etag, body), ttl=ttl)
+    return etag, body
@@ -1,4 +1,4 @@
-from typing import Tuple
+from typing import List, Tuple
 
 from starknet_py.net.full_node_client import FullNodeClient
 from starknet_py.net.account.account import Account
@@ -18,14 +18,7 @@ def to_u256(value: int) -> Tuple[int, int]:
     return low, high
 
 
-async def create_pool_on_chain(
-    pool_id: int,
-    brand: str,
-    token: str,
-    attester_pubkey: int,
-    deadline_ts: int,
-    refund_after_ts: int,
-) -> str:
+def _account() -> Account:
     client = FullNodeClient(node_url=settings.starknet_rpc_url)
     chain_raw = getattr(settings, "starknet_chain_id", None)
     if chain_raw and str(chain_raw).upper() in ("SN_MAIN", "MAINNET"):
@@ -33,14 +26,23 @@ async def create_pool_on_chain(
     else:
         chain_id = StarknetChainId.SEPOLIA
     
-    account = Account(
+    return Account(
         address=int(settings.starknet_account_address, 16),
         client=client,
         key_pair=KeyPair.from_private_key(int(settings.starknet_private_key, 16)),
         chain=chain_id,
     )
-    
-    # Build raw Call for create_pool and submit via Account
+
+
+def _create_pool_call(
+    pool_id: int,
+    brand: str,
+    token: str,
+    attester_pubkey: int,
+    deadline_ts: int,
+    refund_after_ts: int,
+) -> Call:
+    # Build raw Call for create_pool
     to_addr = int(settings.starknet_contract_address, 16)
     brand_addr = int(brand, 16)
     token_addr = int(token, 16)
@@ -54,25 +56,30 @@ async def create_pool_on_chain(
         deadline_ts,
         refund_after_ts,
     ]
-    call = Call(
+    return Call(
         to_addr=to_addr,
         selector=get_selector_from_name("create_pool"),
         calldata=calldata,
     )
 
+
+async def _execute(calls: List[Call]) -> str:
+    """Submit ``calls`` as one (multicall) transaction via Account and wait for it."""
+    account = _account()
+
     # Prefer v3 auto-estimate; fallback to v1 auto-estimate; then legacy execute
     tx_hash = None
     if hasattr(account, "execute_v3"):
         try:
-            tx = await account.execute_v3(calls=[call], auto_estimate=True)
+            tx = await account.execute_v3(calls=calls, auto_estimate=True)
             tx_hash = tx.transaction_hash
         except (TypeError, ClientError):
             tx_hash = None
     if tx_hash is None and hasattr(account, "execute_v1"):
-        tx = await account.execute_v1(calls=[call], auto_estimate=True)  
+        tx = await account.execute_v1(calls=calls, auto_estimate=True)  
         tx_hash = tx.transaction_hash
     if tx_hash is None and hasattr(account, "execute"):
-        tx = await account.execute(calls=[call], auto_estimate=True)  
+        tx = await account.execute(calls=calls, auto_estimate=True)  
         tx_hash = tx.transaction_hash
     if tx_hash is None:
         raise RuntimeError("No compatible execute method found on Account (v3/v1/legacy)")
@@ -81,3 +88,18 @@ async def create_pool_on_chain(
     return hex(tx_hash)
 
 
+async def create_pool_on_chain(
+    pool_id: int,
+    brand: str,
+    token: str,
+    attester_pubkey: int,
+    deadline_ts: int,
+    refund_after_ts: int,
+) -> str:
+    return await _execute([_create_pool_call(pool_id, brand, token, attester_pubkey, deadline_ts, refund_after_ts)])
+
+
+async def create_pools_on_chain(pools: List[Tuple[int, str, str, int, int, int]]) -> str:
+    """create_pool for each (pool_id, brand, token, attester_pubkey, deadline_ts,
+    refund_after_ts) in one multicall transaction; all succeed or all revert."""
+    return await _execute([_create_pool_call(*p) for p in pools])
@@ -0,0 +1,67 @@
+from dataclasses import dataclass
+from typing import Optional
+
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..core.config import settings
+from ..db.models import User
+from ..db.routing import note_write
+from ..db.session import after_commit, async_session
+from ..utils.ttl_cache import TTLCache
+
+
+@dataclass(frozen=True)
+class ResolvedUser:
+    id: int
+    user_type: Optional[str]
+    youtube_channel_id: Optional[str]
+
+
+# Clerk sub -> ResolvedUser. Per process: another worker's write is picked up once
+# the entry expires, so keep the TTL short.
+user_cache: TTLCache[ResolvedUser] = TTLCache(
+    maxsize=settings.user_cache_size, ttl=settings.user_cache_ttl_seconds
+)
+
+
+async def resolve_user(sub: str, db: Optional[AsyncSession] = None, fresh: bool = False) -> ResolvedUser:
+    """Return the user for a Clerk sub, creating it on first sight, in one round trip.
+
+    With ``db`` (a unit of work) the upsert joins that transaction and the result is
+    cached once it commits; otherwise it runs and commits in its own session.
+    ``fresh`` skips the cache, for when a possibly stale entry would be refused.
+    """
+    if not fresh:
+        cached = user_cache.get(sub)
+        if cached is not None:
+            return cached
+    stmt = insert(User).values(sub=sub)
+    # The no-op DO UPDATE makes RETURNING yield the row whether it was inserted or already there
+    stmt = stmt.on_conflict_do_update(index_elements=[User.sub], set_={"sub": stmt.excluded.sub}).returning(
+        User.id, User.user_type, User.youtube_channel_id
+    )
+    if db is not None:
+        row = (await db.execute(stmt)).one()
+    else:
+        async with async_session() as own:
+            row = (await own.execute(stmt)).one()
+            await own.commit()
+    user = ResolvedUser(id=row.id, user_type=row.user_type, youtube_channel_id=row.youtube_channel_id)
+    if db is not None:
+        after_commit(db, lambda: user_cache.set(sub, user))
+    else:
+        user_cache.set(sub, user)
+    return user
+
+
+def invalidate_user(db: AsyncSession, sub: str, updated: Optional[ResolvedUser] = None) -> None:
+    """Call after changing a user's row in ``db``: drops the cached entry now and,
+    once ``db`` commits, caches ``updated`` (or drops it again). Also pins the
+    user's reads to the primary."""
+    user_cache.delete(sub)
+    if updated is not None:
+        after_commit(db, lambda: user_cache.set(sub, updated))
+    else:
+        after_commit(db, lambda: user_cache.delete(sub))
+    note_write(db, sub)
@@ -0,0 +1,129 @@
+import logging
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import or_
+from sqlalchemy.orm import Session
+
+from ..core.config import settings
+from ..db.models import User, Video
+from ..db.session import sync_session
+from ..utils.background import PeriodicJob
+from ..utils.youtube_quota import youtube_quota
+from ..utils.youtube_client import extract_video_id_from_url, fetch_videos_details_batch
+from .channel_stats_cache import get_channel_stats
+from .video_stats import record_snapshots
+
+
+logger = logging.getLogger("video_refresher")
+
+# user db id -> monotonic time of the last GET /api/youtube/videos
+_recent_viewers: Dict[int, float] = {}
+_recent_viewers_lock = threading.Lock()
+
+
+def mark_user_viewed(user_db_id: int) -> None:
+    with _recent_viewers_lock:
+        _recent_viewers[user_db_id] = time.monotonic()
+
+
+def _recent_viewer_ids() -> List[int]:
+    cutoff = time.monotonic() - settings.video_recent_viewer_window_seconds
+    with _recent_viewers_lock:
+        for uid in [uid for uid, ts in _recent_viewers.items() if ts < cutoff]:
+            del _recent_viewers[uid]
+        return list(_recent_viewers)
+
+
+def _select_stale(
+    db: Session,
+    threshold: datetime,
+    limit: int,
+    user_ids: Optional[List[int]] = None,
+    exclude_ids: Optional[List[int]] = None,
+):
+    q = (
+        db.query(Video, User.youtube_channel_id)
+        .join(User, User.id == Video.user_id)
+        .filter(or_(Video.last_refreshed_at.is_(None), Video.last_refreshed_at < threshold))
+    )
+    if user_ids is not None:
+        q = q.filter(Video.user_id.in_(user_ids))
+    if exclude_ids:
+        q = q.filter(Video.id.notin_(exclude_ids))
+    # Walks ix_videos_last_refreshed_at oldest-first; SKIP LOCKED lets several
+    # workers run the refresher without refreshing the same rows
+    return (
+        q.order_by(Video.last_refreshed_at.asc().nullsfirst())
+        .limit(limit)
+        .with_for_update(of=Video, skip_locked=True)
+        .all()
+    )
+
+
+def refresh_videos(db: Session, rows: List[Tuple[Video, Optional[str]]]) -> int:
+    """Refresh (video, owner channel id) pairs with batched YouTube calls; caller commits."""
+    now = datetime.utcnow()
+    targets = []
+    for v, channel_id in rows:
+        vid = extract_video_id_from_url(v.video_url)
+        if vid:
+            targets.append((v, vid, channel_id))
+        else:
+            # Nothing to fetch, but stamp it so it doesn't sit at the head of the queue
+            v.last_refreshed_at = now
+    if not targets:
+        return 0
+    details_by_id = fetch_videos_details_batch(settings.youtube_api_key, [vid for _, vid, _ in targets])
+    # Subscribers come from the owner's linked channel
+    channels = get_channel_stats(db, [c for _, _, c in targets])
+    for v, vid, channel_id in targets:
+        details = details_by_id.get(vid, {})
+        v.likes = details.get("likeCount", v.likes)
+        v.views = details.get("viewCount", v.views)
+        if details.get("channelTitle"):
+            v.yt_channel_title = details.get("channelTitle")
+        ch = channels.get(channel_id) if channel_id else None
+        if ch is not None:
+            v.subscribers_current = ch.get("subscriberCount", v.subscribers_current or 0)
+        v.last_refreshed_at = now
+        db.add(v)
+    record_snapshots(db, [v for v, _, _ in targets], now)
+    return len(targets)
+
+
+def refresh_stale_videos() -> int:
+    """Refresh one batch of stale videos, recently viewed users first. Returns rows refreshed."""
+    threshold = datetime.utcnow() - timedelta(seconds=settings.video_stale_after_seconds)
+    limit = youtube_quota.background_video_limit(
+        settings.video_refresh_batch_size, settings.video_refresh_interval_seconds
+    )
+    if limit <= 0:
+        logger.info("YouTube background quota drained; deferring refresh")
+        return 0
+    with sync_session() as db:
+        rows = []
+        viewers = _recent_viewer_ids()
+        if viewers:
+            rows = _select_stale(db, threshold, limit, user_ids=viewers)
+        if len(rows) < limit:
+            rows += _select_stale(db, threshold, limit - len(rows), exclude_ids=[v.id for v, _ in rows])
+        refreshed = refresh_videos(db, rows)
+        db.commit()
+        return refreshed
+
+
+refresher_job = PeriodicJob(
+    "video_refresher", refresh_stale_videos, lambda: settings.video_refresh_interval_seconds
+)
+
+
+def start_video_refresher() -> None:
+    if settings.video_refresher_enabled:
+        refresher_job.start()
+
+
+async def stop_video_refresher() -> None:
+    await refresher_job.stop()
@@ -0,0 +1,178 @@
+from datetime import datetime, timedelta, timezone
+from typing import List, Optional
+
+from sqlalchemy import insert, select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from ..core.config import settings
+from ..db.models import User, Video, VideoStatRollup, VideoStatSnapshot
+from ..db.routing import read_session
+from ..db.session import sync_session
+from ..utils.background import PeriodicJob
+
+
+GRANULARITIES = ("hour", "day")
+
+# Arbitrary constant for pg_try_advisory_xact_lock so only one worker rolls up at a time
+_ROLLUP_LOCK_KEY = 733_001
+
+
+def naive_utc(dt: datetime) -> datetime:
+    """Timestamps are stored as naive UTC; convert aware inputs (e.g. ``...Z``) to match."""
+    if dt.tzinfo is None:
+        return dt
+    return dt.astimezone(timezone.utc).replace(tzinfo=None)
+
+
+def record_snapshots(db: Session, videos: List[Video], ts: datetime) -> None:
+    """Append the current stats of each video to the history table; caller commits."""
+    rows = [
+        {
+            "video_id": v.id,
+            "ts": ts,
+            "views": v.views or 0,
+            "likes": v.likes or 0,
+            "subscribers": v.subscribers_current,
+        }
+        for v in videos
+    ]
+    if rows:
+        db.execute(insert(VideoStatSnapshot), rows)
+
+
+_ROLLUP_HOURLY_SQL = text(
+    """
+    INSERT INTO video_stat_rollups (video_id, granularity, bucket_start, views, likes, subscribers, samples)
+    SELECT DISTINCT ON (video_id, date_trunc('hour', ts))
+           video_id, 'hour', date_trunc('hour', ts), views, likes, subscribers,
+           count(*) OVER (PARTITION BY video_id, date_trunc('hour', ts))
+    FROM video_stat_snapshots
+    WHERE ts >= :since
+    ORDER BY video_id, date_trunc('hour', ts), ts DESC
+    ON CONFLICT (video_id, granularity, bucket_start) DO UPDATE
+    SET views = EXCLUDED.views, likes = EXCLUDED.likes,
+        subscribers = EXCLUDED.subscribers, samples = EXCLUDED.samples
+    """
+)
+
+_ROLLUP_DAILY_SQL = text(
+    """
+    INSERT INTO video_stat_rollups (video_id, granularity, bucket_start, views, likes, subscribers, samples)
+    SELECT DISTINCT ON (video_id, date_trunc('day', bucket_start))
+           video_id, 'day', date_trunc('day', bucket_start), views, likes, subscribers,
+           sum(samples) OVER (PARTITION BY video_id, date_trunc('day', bucket_start))
+    FROM video_stat_rollups
+    WHERE granularity = 'hour' AND bucket_start >= :since
+    ORDER BY video_id, date_trunc('day', bucket_start), bucket_start DESC
+    ON CONFLICT (video_id, granularity, bucket_start) DO UPDATE
+    SET views = EXCLUDED.views, likes = EXCLUDED.likes,
+        subscribers = EXCLUDED.subscribers, samples = EXCLUDED.samples
+    """
+)
+
+
+def rollup_video_stats(since: Optional[datetime] = None) -> Optional[str]:
+    """Rebuild hourly buckets from raw snapshots and daily buckets from hourly ones.
+
+    Only the trailing window (or everything after ``since`` for a backfill) is
+    recomputed; the upserts are idempotent so overlapping runs are harmless.
+    Raw snapshots past their retention are dropped once they are rolled up.
+    """
+    now = datetime.utcnow()
+    if since is not None:
+        since = naive_utc(since)
+    # Whole hours only: a partial first bucket would be rebuilt from part of its snapshots
+    hourly_since = (since or now - timedelta(hours=2)).replace(minute=0, second=0, microsecond=0)
+    daily_since = since or (now - timedelta(days=1)).replace(hour=0, minute=0, second=0, microsecond=0)
+    # Daily buckets are rebuilt from whole days of hourly buckets
+    daily_since = daily_since.replace(hour=0, minute=0, second=0, microsecond=0)
+    with sync_session() as db:
+        locked = db.execute(text("SELECT pg_try_advisory_xact_lock(:k)"), {"k": _ROLLUP_LOCK_KEY}).scalar()
+        if not locked:
+            return None
+        hourly = db.execute(_ROLLUP_HOURLY_SQL, {"since": hourly_since}).rowcount
+        daily = db.execute(_ROLLUP_DAILY_SQL, {"since": daily_since}).rowcount
+        pruned = 0
+        if settings.video_stats_raw_retention_days > 0:
+            # Never prune past the hourly window that was just rolled up
+            cutoff = min(now - timedelta(days=settings.video_stats_raw_retention_days), hourly_since)
+            pruned = (
+                db.query(VideoStatSnapshot)
+                .filter(VideoStatSnapshot.ts < cutoff)
+                .delete(synchronize_session=False)
+            )
+        db.commit()
+        if hourly or daily or pruned:
+            return f"{hourly} hourly, {daily} daily buckets upserted; {pruned} raw snapshots pruned"
+        return None
+
+
+def _pick_granularity(start: datetime, end: datetime) -> str:
+    return "hour" if end - start <= timedelta(days=settings.video_stats_hourly_max_days) else "day"
+
+
+async def get_video_stats_series(
+    db: AsyncSession,
+    user_id: str,
+    video_db_id: int,
+    start: datetime,
+    end: datetime,
+    granularity: Optional[str] = None,
+) -> dict:
+    start, end = naive_utc(start), naive_utc(end)
+    if end <= start:
+        raise ValueError("end must be after start")
+    if granularity is not None and granularity not in GRANULARITIES:
+        raise ValueError(f"granularity must be one of {', '.join(GRANULARITIES)}")
+    granularity = granularity or _pick_granularity(start, end)
+    async with read_session(user_id, primary=db) as rdb:
+        owned = (
+            await rdb.execute(
+                select(Video.id)
+                .join(User, User.id == Video.user_id)
+                .where(Video.id == video_db_id, User.sub == user_id)
+            )
+        ).first()
+        if owned is None:
+            raise LookupError("Video not found")
+        rows = (
+            await rdb.execute(
+                select(
+                    VideoStatRollup.bucket_start,
+                    VideoStatRollup.views,
+                    VideoStatRollup.likes,
+                    VideoStatRollup.subscribers,
+                )
+                .where(
+                    VideoStatRollup.video_id == video_db_id,
+                    VideoStatRollup.granularity == granularity,
+                    VideoStatRollup.bucket_start >= start,
+                    VideoStatRollup.bucket_start < end,
+                )
+                .order_by(VideoStatRollup.bucket_start)
+            )
+        ).all()
+    points = [
+        {"bucket_start": r.bucket_start, "views": r.views, "likes": r.likes, "subscribers": r.subscribers}
+        for r in rows
+    ]
+    return {
+        "video_id": video_db_id,
+        "granularity": granularity,
+        "points": points,
+        "views_gained": points[-1]["views"] - points[0]["views"] if points else 0,
+        "likes_gained": points[-1]["likes"] - points[0]["likes"] if points else 0,
+    }
+
+
+rollup_job = PeriodicJob("video_stats_rollup", rollup_video_stats, lambda: settings.video_stats_rollup_interval_seconds)
+
+
+def start_video_stats_rollup() -> None:
+    if settings.video_stats_rollup_enabled:
+        rollup_job.start()
+
+
+async def stop_video_stats_rollup() -> None:
+    await rollup_job.stop()
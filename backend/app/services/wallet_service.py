@@ -1,26 +1,27 @@
+from dataclasses import replace
 from typing import Optional
 
-from ..db.models import User
-from ..utils.youtube_client import fetch_my_channel_id_with_token
-from .clerk_service import get_google_access_token_for_user
-from ..db.session import get_db_session
-
+from sqlalchemy import update
+from sqlalchemy.ext.asyncio import AsyncSession
 
-def link_wallet_to_user(user_id: str, wallet_address: str, google_access_token: Optional[str] = None) -> None:
-    with next(get_db_session()) as db:  # type: ignore
-        user = db.query(User).filter(User.sub == user_id).first()
-        if user is None:
-            user = User(sub=user_id)
-            db.add(user)
-            db.commit()
-            db.refresh(user)
-        user.wallet_address = wallet_address
-        if not user.youtube_channel_id:
-            token_to_use = google_access_token or get_google_access_token_for_user(user_id)
-            channel_id = fetch_my_channel_id_with_token(token_to_use) if token_to_use else None
-            if channel_id:
-                user.youtube_channel_id = channel_id
-        db.add(user)
-        db.commit()
+from ..db.models import User
+from ..db.session import release_connection
+from ..utils.youtube_client import fetch_my_channel_id_with_token_async
+from .clerk_service import get_google_access_token_for_user_async
+from .user_resolver import invalidate_user, resolve_user
 
 
+async def link_wallet_to_user(
+    db: AsyncSession, user_id: str, wallet_address: str, google_access_token: Optional[str] = None
+) -> None:
+    user = await resolve_user(user_id, db)
+    values = {"wallet_address": wallet_address}
+    if not user.youtube_channel_id:
+        await release_connection(db)
+        token_to_use = google_access_token or await get_google_access_token_for_user_async(user_id)
+        channel_id = await fetch_my_channel_id_with_token_async(token_to_use) if token_to_use else None
+        if channel_id:
+            values["youtube_channel_id"] = channel_id
+    await db.execute(update(User).where(User.id == user.id).values(**values))
+    linked_channel = values.get("youtube_channel_id", user.youtube_channel_id)
+    invalidate_user(db, user_id, replace(user, youtube_channel_id=linked_channel))
@@ -1,131 +1,209 @@
 from __future__ import annotations
 
-from datetime import datetime, timedelta
+import asyncio
+import math
+from dataclasses import replace
+from datetime import datetime
 from typing import List
 
-from sqlalchemy.orm import Session
+from sqlalchemy import select, update
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from ..core.config import settings
 from ..db.models import User, Video
-from ..db.session import get_db_session
+from ..db.routing import note_write, read_session
+from ..db.session import release_connection
 from ..utils.youtube_client import (
+    YOUTUBE_MAX_IDS_PER_CALL,
     extract_video_id_from_url,
-    fetch_channel_stats,
-    fetch_video_details,
+    fetch_video_details_async,
+    fetch_videos_details_batch_async,
 )
+from ..utils.youtube_quota import ENDPOINT_COSTS, youtube_quota
+from .channel_stats_cache import cached_subscribers, get_channel_stats_async
+from .user_resolver import ResolvedUser, invalidate_user, resolve_user
+from .video_refresher import mark_user_viewed
+from .video_stats import record_snapshots
+
+
+async def _insert_video(db: AsyncSession, user_db_id: int, video_url: str, details: dict, subscribers: int) -> dict:
+    now = datetime.utcnow()
+    video = Video(
+        user_id=user_db_id,
+        video_url=video_url,
+        likes=details.get("likeCount", 0),
+        views=details.get("viewCount", 0),
+        subscribers_at_add=subscribers,
+        yt_channel_id=details.get("channelId"),
+        yt_channel_title=details.get("channelTitle"),
+        last_refreshed_at=now,
+        subscribers_current=subscribers,
+    )
+    db.add(video)
+    await db.flush()
+    await db.run_sync(record_snapshots, [video], now)
+    return {
+        "id": video.id,
+        "video_url": video.video_url,
+        "likes": video.likes,
+        "views": video.views,
+        "subscribers": subscribers,
+        "channel_id": video.yt_channel_id,
+        "channel_title": video.yt_channel_title,
+    }
+
+
+async def add_video_for_user(db: AsyncSession, user_id: str, video_url: str) -> dict:
+    """The video and channel lookups run concurrently and no DB connection is held
+    while waiting on YouTube."""
+    video_id = extract_video_id_from_url(video_url)
+    if video_id is None:
+        raise ValueError("Invalid YouTube URL")
+    user = await resolve_user(user_id, db)
+    await release_connection(db)
+    user_db_id, channel_id = user.id, user.youtube_channel_id
+    # Require ownership: user's linked channel must match the video's channelId
+    if not channel_id:
+        raise ValueError("Please link your YouTube channel first")
+    youtube_quota.ensure_available(ENDPOINT_COSTS["videos.list"] + ENDPOINT_COSTS["channels.list"])
+
+    details, channel_stats = await asyncio.gather(
+        fetch_video_details_async(settings.youtube_api_key, video_id),
+        get_channel_stats_async(db, channel_id),
+    )
+    if details.get("channelId") != channel_id:
+        raise ValueError("Please add your own video (channel mismatch)")
+
+    subscribers = channel_stats.get("subscriberCount", 0)
+    video = await _insert_video(db, user_db_id, video_url, details, subscribers)
+    note_write(db, user_id)
+    return video
+
+
+async def add_videos_for_user(db: AsyncSession, user_id: str, video_urls: List[str]) -> dict:
+    """Bulk add_video_for_user: one batched details lookup, one channel lookup and one
+    INSERT for the whole list. Returns a result per URL, in request order."""
+    user = await resolve_user(user_id, db)
+    await release_connection(db)
+    channel_id = user.youtube_channel_id
+    if not channel_id:
+        raise ValueError("Please link your YouTube channel first")
+
+    # status stays None while a URL is still a candidate for insertion
+    results = []
+    ids_by_url = {}
+    for url in video_urls:
+        video_id = extract_video_id_from_url(url)
+        results.append({"video_url": url, "status": None if video_id else "invalid_url"})
+        if video_id is not None:
+            ids_by_url[url] = video_id
+    chunks = math.ceil(len(set(ids_by_url.values())) / YOUTUBE_MAX_IDS_PER_CALL)
+    youtube_quota.ensure_available(ENDPOINT_COSTS["videos.list"] * chunks + ENDPOINT_COSTS["channels.list"])
+
+    details_by_id, channel_stats = await asyncio.gather(
+        fetch_videos_details_batch_async(settings.youtube_api_key, ids_by_url.values()),
+        get_channel_stats_async(db, channel_id),
+    )
+    subscribers = channel_stats.get("subscriberCount", 0)
+
+    now = datetime.utcnow()
+    rows = {}
+    for result in results:
+        if result["status"] is not None:
+            continue
+        url = result["video_url"]
+        details = details_by_id.get(ids_by_url[url])
+        if details is None:
+            result["status"] = "not_found"
+        elif details.get("channelId") != channel_id:
+            result["status"] = "channel_mismatch"
+        elif url in rows:
+            result["status"] = "duplicate"
+        else:
+            rows[url] = {
+                "user_id": user.id,
+                "video_url": url,
+                "likes": details.get("likeCount", 0),
+                "views": details.get("viewCount", 0),
+                "subscribers_at_add": subscribers,
+                "yt_channel_id": channel_id,
+                "yt_channel_title": details.get("channelTitle"),
+                "last_refreshed_at": now,
+                "subscribers_current": subscribers,
+            }
 
-
-def get_or_create_user_by_sub(db: Session, user_sub: str) -> User:
-    user = db.query(User).filter(User.sub == user_sub).first()
-    if user is None:
-        user = User(sub=user_sub)
-        db.add(user)
-        db.commit()
-        db.refresh(user)
-    return user
-
-
-def add_video_for_user(user_id: str, video_url: str) -> dict:
-    with next(get_db_session()) as db:  # type: ignore
-        user = get_or_create_user_by_sub(db, user_id)
-        video_id = extract_video_id_from_url(video_url)
-        if video_id is None:
-            raise ValueError("Invalid YouTube URL")
-
-        # Fetch video details (includes channelId and channelTitle)
-        details = fetch_video_details(settings.youtube_api_key, video_id)
-
-        # Require ownership: user's linked channel must match the video's channelId
-        if not user.youtube_channel_id:
-            raise ValueError("Please link your YouTube channel first")
-        if details.get("channelId") != user.youtube_channel_id:
-            raise ValueError("Please add your own video (channel mismatch)")
-
-        # Optional: capture subscribers at add time from the user's channel
-        subscribers = 0
-        channel_stats = fetch_channel_stats(settings.youtube_api_key, user.youtube_channel_id)
-        subscribers = channel_stats.get("subscriberCount", 0)
-        stats = {"likeCount": details.get("likeCount", 0), "viewCount": details.get("viewCount", 0)}
-        now = datetime.utcnow()
-        video = Video(
-            user_id=user.id,
-            video_url=video_url,
-            likes=stats.get("likeCount", 0),
-            views=stats.get("viewCount", 0),
-            subscribers_at_add=subscribers,
-            yt_channel_id=details.get("channelId"),
-            yt_channel_title=details.get("channelTitle"),
-            last_refreshed_at=now,
-            subscribers_current=subscribers,
+    inserted = {}
+    if rows:
+        stmt = (
+            insert(Video)
+            .values(list(rows.values()))
+            .on_conflict_do_nothing(constraint="uq_user_video")
+            .returning(Video.id, Video.video_url, Video.likes, Video.views, Video.subscribers_current)
         )
-        db.add(video)
-        db.commit()
-        return {
-            "id": video.id,
-            "video_url": video.video_url,
-            "likes": video.likes,
-            "views": video.views,
-            "subscribers": subscribers,
-            "channel_id": video.yt_channel_id,
-            "channel_title": video.yt_channel_title,
+        new_rows = (await db.execute(stmt)).all()
+        await db.run_sync(record_snapshots, new_rows, now)
+        inserted = {r.video_url: r for r in new_rows}
+        note_write(db, user_id)
+
+    for result in results:
+        if result["status"] is not None:
+            continue
+        row = inserted.get(result["video_url"])
+        if row is None:
+            # Skipped by ON CONFLICT: already stored for this user
+            result["status"] = "duplicate"
+        else:
+            result.update(status="added", id=row.id, likes=row.likes, views=row.views)
+    return {
+        "added": sum(r["status"] == "added" for r in results),
+        "results": results,
+        "subscribers": subscribers,
+        "channel_id": channel_id,
+    }
+
+
+async def _list_user_videos(db: AsyncSession, user: ResolvedUser) -> List[dict]:
+    videos = (
+        await db.execute(select(Video).where(Video.user_id == user.id).order_by(Video.id.desc()))
+    ).scalars().all()
+    # Stats are kept fresh by the background refresher; serve what is stored and
+    # bump this user's priority for the next refresh cycle
+    mark_user_viewed(user.id)
+    # A warm channel-stats entry is at least as fresh as the per-video copy
+    live_subscribers = cached_subscribers(user.youtube_channel_id)
+    return [
+        {
+            "id": v.id,
+            "video_url": v.video_url,
+            "likes": v.likes,
+            "views": v.views,
+            "subscribers_at_add": v.subscribers_at_add,
+            "subscribers_current": (
+                live_subscribers
+                if live_subscribers is not None
+                else v.subscribers_current if v.subscribers_current is not None else v.subscribers_at_add
+            ),
+            "channel_id": v.yt_channel_id,
+            "channel_title": v.yt_channel_title,
+            "last_refreshed_at": v.last_refreshed_at,
         }
+        for v in videos
+    ]
 
 
-def get_user_videos(user_id: str) -> List[dict]:
-    with next(get_db_session()) as db:  # type: ignore
-        user = get_or_create_user_by_sub(db, user_id)
-        videos = db.query(Video).filter(Video.user_id == user.id).order_by(Video.id.desc()).all()
-
-        # refresh any stale entries (> 1 hour old)
-        threshold = datetime.utcnow() - timedelta(hours=1)
-        dirty = False
-        for v in videos:
-            if v.last_refreshed_at is None or v.last_refreshed_at < threshold:
-                vid = extract_video_id_from_url(v.video_url)
-                if not vid:
-                    continue
-                details = fetch_video_details(settings.youtube_api_key, vid)
-                # Update stats
-                v.likes = details.get("likeCount", v.likes)
-                v.views = details.get("viewCount", v.views)
-                # Update channel info if changed
-                if details.get("channelTitle"):
-                    v.yt_channel_title = details.get("channelTitle")
-                # Update subscribers (from user's linked channel)
-                if user.youtube_channel_id:
-                    ch = fetch_channel_stats(settings.youtube_api_key, user.youtube_channel_id)
-                    v.subscribers_current = ch.get("subscriberCount", v.subscribers_current or 0)
-                v.last_refreshed_at = datetime.utcnow()
-                db.add(v)
-                dirty = True
-        if dirty:
-            db.commit()
-        return [
-            {
-                "id": v.id,
-                "video_url": v.video_url,
-                "likes": v.likes,
-                "views": v.views,
-                "subscribers_at_add": v.subscribers_at_add,
-                "subscribers_current": v.subscribers_current if v.subscribers_current is not None else v.subscribers_at_add,
-                "channel_id": v.yt_channel_id,
-                "channel_title": v.yt_channel_title,
-            }
-            for v in videos
-        ]
-
-
-def set_user_type(user_id: str, user_type: str) -> None:
-    with next(get_db_session()) as db:  # type: ignore
-        user = get_or_create_user_by_sub(db, user_id)
-        user.user_type = user_type
-        db.add(user)
-        db.commit()
+async def get_user_videos(db: AsyncSession, user_id: str) -> List[dict]:
+    user = await resolve_user(user_id, db)
+    async with read_session(user_id, primary=db) as rdb:
+        return await _list_user_videos(rdb, user)
 
 
-def get_user_profile(user_id: str) -> dict:
-    with next(get_db_session()) as db:  # type: ignore
-        user = get_or_create_user_by_sub(db, user_id)
-        return {"user_type": user.user_type}
+async def set_user_type(db: AsyncSession, user_id: str, user_type: str) -> None:
+    user = await resolve_user(user_id, db)
+    await db.execute(update(User).where(User.id == user.id).values(user_type=user_type))
+    invalidate_user(db, user_id, replace(user, user_type=user_type))
 
 
+async def get_user_profile(db: AsyncSession, user_id: str) -> dict:
+    user = await resolve_user(user_id, db)
+    return {"user_type": user.user_type}
@@ -0,0 +1,40 @@
+import asyncio
+import logging
+from typing import Callable, Optional
+
+
+logger = logging.getLogger("background")
+
+
+class PeriodicJob:
+    """Runs a blocking ``fn`` in a worker thread every ``interval`` seconds on the app loop."""
+
+    def __init__(self, name: str, fn: Callable[[], object], interval: Callable[[], float]) -> None:
+        self.name = name
+        self.fn = fn
+        self.interval = interval
+        self._task: Optional[asyncio.Task] = None
+
+    async def _run_forever(self) -> None:
+        while True:
+            try:
+                result = await asyncio.to_thread(self.fn)
+                if result:
+                    logger.info("%s: %s", self.name, result)
+            except Exception:
+                logger.exception("%s failed", self.name)
+            await asyncio.sleep(self.interval())
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self._run_forever())
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
@@ -0,0 +1,69 @@
+import importlib.util
+import threading
+from typing import Optional
+
+import httpx
+
+from ..core.config import settings
+
+
+# Shared outbound clients. httpx keeps a keep-alive pool per origin inside each
+# client, so googleapis.com and api.clerk.com each get their own warm connections
+# instead of a fresh TLS handshake on every call.
+_client: Optional[httpx.Client] = None
+_async_client: Optional[httpx.AsyncClient] = None
+_lock = threading.Lock()
+
+
+def _http2_available() -> bool:
+    return settings.http2_enabled and importlib.util.find_spec("h2") is not None
+
+
+def _client_kwargs() -> dict:
+    return {
+        "timeout": httpx.Timeout(
+            settings.http_timeout_seconds,
+            connect=settings.http_connect_timeout_seconds,
+            pool=settings.http_pool_timeout_seconds,
+        ),
+        "limits": httpx.Limits(
+            max_connections=settings.http_max_connections,
+            max_keepalive_connections=settings.http_max_keepalive_connections,
+            keepalive_expiry=settings.http_keepalive_expiry_seconds,
+        ),
+        "http2": _http2_available(),
+    }
+
+
+def get_http_client() -> httpx.Client:
+    global _client
+    if _client is None or _client.is_closed:
+        with _lock:
+            if _client is None or _client.is_closed:
+                _client = httpx.Client(**_client_kwargs())
+    return _client
+
+
+def get_async_http_client() -> httpx.AsyncClient:
+    # AsyncClient is bound to the running event loop; init_http_clients creates it
+    # on the app loop at startup
+    global _async_client
+    if _async_client is None or _async_client.is_closed:
+        _async_client = httpx.AsyncClient(**_client_kwargs())
+    return _async_client
+
+
+def init_http_clients() -> None:
+    get_http_client()
+    get_async_http_client()
+
+
+async def close_http_clients() -> None:
+    global _client, _async_client
+    if _async_client is not None:
+        await _async_client.aclose()
+        _async_client = None
+    with _lock:
+        if _client is not None:
+            _client.close()
+            _client = None
@@ -1,9 +1,6 @@
 import hashlib
-from typing import List, Dict, Any, Tuple
+from typing import List, Dict, Any, Iterable, Tuple
 import json
-from sqlalchemy.orm import Session
-from sqlalchemy import select
-from ..db.models import User
 
 def secure_hash(leaf_tag: str, pool_id: int, epoch: int, index: int, 
                 account: str, shares: int, amount: int, count: int = 7) -> str:
@@ -84,21 +81,19 @@ def sort_distribution_data(distribution_data: List[Dict[str, Any]]) -> List[Dict
     """
     return sorted(distribution_data, key=lambda x: x['account'])
 
-def build_merkle_tree(sorted_data: List[Dict[str, Any]], pool_id: int, epoch: int) -> Tuple[str, List[str]]:
+def build_merkle_tree(sorted_data: Iterable[Dict[str, Any]], pool_id: int, epoch: int) -> Tuple[str, List[str]]:
     """
     Builds a merkle tree from sorted distribution data.
     
     Args:
-        sorted_data: Sorted list of distribution records
+        sorted_data: Sorted distribution records; any iterable, e.g. the
+            streaming reader from distribution_service
         pool_id: ID of the mining pool
         epoch: Epoch number
         
     Returns:
         Tuple of (merkle_root, leaf_hashes)
     """
-    if not sorted_data:
-        return "", []
-    
     # Generate leaf hashes
     leaves = []
     for i, item in enumerate(sorted_data):
@@ -113,6 +108,9 @@ def build_merkle_tree(sorted_data: List[Dict[str, Any]], pool_id: int, epoch: in
         )
         l_hash = leaf_hash(item['account'], s_hash)
         leaves.append(l_hash)
+
+    if not leaves:
+        return "", []
     
     # If we have an odd number of leaves, duplicate the last one
     if len(leaves) % 2 == 1:
@@ -168,46 +166,26 @@ def verify_merkle_proof(account: str, amount: int, shares: int, proof: List[Dict
     # Check if we've arrived at the merkle root
     return current_hash == merkle_root
 
-def generate_merkle_proof(pool_id: str, epoch: int, user_address: str, db: Session) -> Tuple[List[str], str]:
+def generate_merkle_proof(
+    pool_id: int, epoch: int, user_data: Dict[str, Any], records: Iterable[Dict[str, Any]]
+) -> Tuple[List[str], str]:
     """
     Generates a merkle proof for a user in a specific pool and epoch.
     
     Args:
         pool_id: ID of the pool
-        epoch: Epoch number (optional)
-        user_address: User account address
-        db: Database session
+        epoch: Epoch number
+        user_data: The user's distribution record (index, account, shares, amount)
+        records: All of the epoch's records in account order; any iterable
         
     Returns:
         Tuple of (proof, leaf_value)
     """
-    # In a real implementation, you would fetch the pool data from the database
-    # For now, we'll simulate fetching the data
-    
-    # 1. Get the distribution data for the pool and epoch
-    # This would typically come from a database query
-    distribution_data = [
-        {"account": "0x123", "shares": 100, "amount": 1000},
-        {"account": "0x456", "shares": 200, "amount": 2000},
-        {"account": user_address, "shares": 150, "amount": 1500},
-        {"account": "0x789", "shares": 300, "amount": 3000}
-    ]
-    
-    # 2. Sort the distribution data
-    sorted_data = sort_distribution_data(distribution_data)
-    
-    # 3. Find the index of the user in the sorted data
-    user_index = -1
-    for i, item in enumerate(sorted_data):
-        if item["account"] == user_address:
-            user_index = i
-            break
-            
-    if user_index == -1:
-        raise ValueError(f"User {user_address} not found in pool {pool_id} for epoch {epoch}")
+    # 1. The user's leaf position
+    user_index = user_data["index"]
     
-    # 4. Build the merkle tree
-    merkle_root, leaves = build_merkle_tree(sorted_data, int(pool_id), epoch or 0)
+    # 2-4. Build the tree from the epoch's records (already in account order)
+    merkle_root, leaves = build_merkle_tree(records, pool_id, epoch)
     
     # 5. Generate the proof
     proof = []
@@ -236,11 +214,10 @@ def generate_merkle_proof(pool_id: str, epoch: int, user_address: str, db: Sessi
         current_level = next_level
     
     # 6. Calculate the leaf hash for the user
-    user_data = sorted_data[user_index]
     s_hash = secure_hash(
         "LEAF_TAG",
-        int(pool_id),
-        epoch or 0,
+        pool_id,
+        epoch,
         user_index,
         user_data["account"],
         user_data["shares"],
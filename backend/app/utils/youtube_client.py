@@ -1,8 +1,14 @@
+import asyncio
 import re
-from typing import Dict, Optional
+from typing import Dict, Iterable, Iterator, List, Optional
 
 import httpx
 
+from ..core.config import settings
+from .http_client import get_async_http_client, get_http_client
+from .ttl_cache import TTLCache
+from .youtube_quota import YOUTUBE_MAX_IDS_PER_CALL, youtube_quota
+
 
 YOUTUBE_VIDEO_URL_PATTERNS = [
     r"https?://(?:www\.)?youtube\.com/watch\?v=([\w-]{11})",
@@ -10,6 +16,112 @@ YOUTUBE_VIDEO_URL_PATTERNS = [
 ]
 
 
+def _record_call(endpoint: str, res: httpx.Response) -> None:
+    youtube_quota.record(endpoint)
+    if res.status_code == 403 and "quotaExceeded" in res.text:
+        youtube_quota.mark_exhausted()
+
+
+def _youtube_get(endpoint: str, url: str, **kwargs) -> httpx.Response:
+    res = get_http_client().get(url, **kwargs)
+    _record_call(endpoint, res)
+    return res
+
+
+async def _youtube_get_async(endpoint: str, url: str, **kwargs) -> httpx.Response:
+    res = await get_async_http_client().get(url, **kwargs)
+    _record_call(endpoint, res)
+    return res
+
+
+# Conditional-request cache: (endpoint, params without the API key) -> (etag, json body).
+# A 304 answer to If-None-Match reuses the stored body instead of downloading
+# and parsing it again.
+etag_cache: TTLCache = TTLCache(
+    maxsize=settings.youtube_etag_cache_size, ttl=settings.youtube_etag_cache_ttl_seconds
+)
+etag_stats = {"not_modified": 0, "modified": 0}
+
+
+def _etag_key(endpoint: str, params: dict) -> tuple:
+    return (endpoint,) + tuple(sorted((k, v) for k, v in params.items() if k != "key"))
+
+
+def _conditional_headers(cached: Optional[tuple]) -> dict:
+    return {"If-None-Match": cached[0]} if cached else {}
+
+
+def _resolve_conditional(key: tuple, cached: Optional[tuple], res: httpx.Response) -> dict:
+    # ``cached`` is the entry the request's If-None-Match came from: the cache may
+    # have evicted it by the time the 304 arrives
+    if res.status_code == 304 and cached is not None:
+        etag_stats["not_modified"] += 1
+        # Re-arm the TTL: the stored body is confirmed current
+        etag_cache.set(key, cached)
+        return cached[1]
+    res.raise_for_status()
+    data = res.json()
+    etag = res.headers.get("ETag") or data.get("etag")
+    if etag:
+        etag_stats["modified"] += 1
+        etag_cache.set(key, (etag, data))
+    return data
+
+
+def _youtube_get_json(endpoint: str, url: str, params: dict) -> dict:
+    key = _etag_key(endpoint, params)
+    cached = etag_cache.get(key)
+    res = _youtube_get(endpoint, url, params=params, headers=_conditional_headers(cached))
+    return _resolve_conditional(key, cached, res)
+
+
+async def _youtube_get_json_async(endpoint: str, url: str, params: dict) -> dict:
+    key = _etag_key(endpoint, params)
+    cached = etag_cache.get(key)
+    res = await _youtube_get_async(endpoint, url, params=params, headers=_conditional_headers(cached))
+    return _resolve_conditional(key, cached, res)
+
+
+def _parse_channel_stats(data: dict) -> Dict[str, int]:
+    items = data.get("items", [])
+    if not items:
+        return {"subscriberCount": 0}
+    stats = items[0].get("statistics", {})
+    return {"subscriberCount": int(stats.get("subscriberCount", 0))}
+
+
+def _parse_my_channel_id(res: httpx.Response) -> Optional[str]:
+    if res.status_code != 200:
+        return None
+    items = res.json().get("items", [])
+    if not items:
+        return None
+    return items[0].get("id")
+
+
+def _parse_video_item(item: dict) -> Dict[str, Optional[str]]:
+    stats = item.get("statistics", {})
+    snippet = item.get("snippet", {})
+    return {
+        "likeCount": int(stats.get("likeCount", 0)),
+        "viewCount": int(stats.get("viewCount", 0)),
+        "channelId": snippet.get("channelId"),
+        "channelTitle": snippet.get("channelTitle"),
+    }
+
+
+def _parse_video_details(data: dict) -> Dict[str, Optional[str]]:
+    items = data.get("items", [])
+    if not items:
+        return {
+            "likeCount": 0,
+            "viewCount": 0,
+            "channelId": None,
+            "channelTitle": None,
+        }
+    return _parse_video_item(items[0])
+
+
 def extract_video_id_from_url(url: str) -> Optional[str]:
     for pattern in YOUTUBE_VIDEO_URL_PATTERNS:
         match = re.match(pattern, url)
@@ -19,82 +131,112 @@ def extract_video_id_from_url(url: str) -> Optional[str]:
 
 
 def fetch_channel_stats(api_key: str, channel_id: str) -> Dict[str, int]:
-    url = (
-        "https://www.googleapis.com/youtube/v3/channels"
-        f"?part=statistics&id={channel_id}&key={api_key}"
-    )
-    with httpx.Client(timeout=10) as client:
-        res = client.get(url)
-        res.raise_for_status()
-        data = res.json()
-        items = data.get("items", [])
-        if not items:
-            return {"subscriberCount": 0}
-        stats = items[0].get("statistics", {})
-        return {"subscriberCount": int(stats.get("subscriberCount", 0))}
+    url = f"{settings.youtube_api_base_url}/channels"
+    params = {"part": "statistics", "id": channel_id, "key": api_key}
+    return _parse_channel_stats(_youtube_get_json("channels.list", url, params))
+
+
+async def fetch_channel_stats_async(api_key: str, channel_id: str) -> Dict[str, int]:
+    url = f"{settings.youtube_api_base_url}/channels"
+    params = {"part": "statistics", "id": channel_id, "key": api_key}
+    return _parse_channel_stats(await _youtube_get_json_async("channels.list", url, params))
 
 
 def fetch_my_channel_id_with_token(google_access_token: str) -> Optional[str]:
-    url = "https://www.googleapis.com/youtube/v3/channels"
+    url = f"{settings.youtube_api_base_url}/channels"
+    params = {"part": "id", "mine": "true"}
+    headers = {"Authorization": f"Bearer {google_access_token}"}
+    res = _youtube_get("channels.list", url, params=params, headers=headers)
+    return _parse_my_channel_id(res)
+
+
+async def fetch_my_channel_id_with_token_async(google_access_token: str) -> Optional[str]:
+    url = f"{settings.youtube_api_base_url}/channels"
     params = {"part": "id", "mine": "true"}
     headers = {"Authorization": f"Bearer {google_access_token}"}
-    with httpx.Client(timeout=10) as client:
-        res = client.get(url, params=params, headers=headers)
-        if res.status_code != 200:
-            return None
-        data = res.json()
-        items = data.get("items", [])
-        if not items:
-            return None
-        return items[0].get("id")
+    res = await _youtube_get_async("channels.list", url, params=params, headers=headers)
+    return _parse_my_channel_id(res)
 
 
 def fetch_video_stats(api_key: str, video_id: str) -> Dict[str, int]:
     # kept for potential future background refresh; not used by current endpoints
     url = (
-        "https://www.googleapis.com/youtube/v3/videos"
+        f"{settings.youtube_api_base_url}/videos"
         f"?part=statistics&id={video_id}&key={api_key}"
     )
-    with httpx.Client(timeout=10) as client:
-        res = client.get(url)
-        res.raise_for_status()
-        data = res.json()
-        items = data.get("items", [])
-        if not items:
-            return {"likeCount": 0, "viewCount": 0}
-        stats = items[0].get("statistics", {})
-        return {
-            "likeCount": int(stats.get("likeCount", 0)),
-            "viewCount": int(stats.get("viewCount", 0)),
-        }
+    res = _youtube_get("videos.list", url)
+    res.raise_for_status()
+    data = res.json()
+    items = data.get("items", [])
+    if not items:
+        return {"likeCount": 0, "viewCount": 0}
+    stats = items[0].get("statistics", {})
+    return {
+        "likeCount": int(stats.get("likeCount", 0)),
+        "viewCount": int(stats.get("viewCount", 0)),
+    }
 
 
 def fetch_video_details(api_key: str, video_id: str) -> Dict[str, Optional[str]]:
     """Return statistics and snippet basics: likeCount, viewCount, channelId, channelTitle."""
-    url = (
-        "https://www.googleapis.com/youtube/v3/videos"
-        f"?part=statistics,snippet&id={video_id}&key={api_key}"
+    url = f"{settings.youtube_api_base_url}/videos"
+    params = {"part": "statistics,snippet", "id": video_id, "key": api_key}
+    return _parse_video_details(_youtube_get_json("videos.list", url, params))
+
+
+async def fetch_video_details_async(api_key: str, video_id: str) -> Dict[str, Optional[str]]:
+    url = f"{settings.youtube_api_base_url}/videos"
+    params = {"part": "statistics,snippet", "id": video_id, "key": api_key}
+    return _parse_video_details(await _youtube_get_json_async("videos.list", url, params))
+
+
+def _chunked(ids: List[str], size: int = YOUTUBE_MAX_IDS_PER_CALL) -> Iterator[List[str]]:
+    for i in range(0, len(ids), size):
+        yield ids[i : i + size]
+
+
+def fetch_videos_details_batch(api_key: str, video_ids: Iterable[str]) -> Dict[str, Dict[str, Optional[str]]]:
+    """Batched fetch_video_details: returns {video_id: details} for every id YouTube knows about."""
+    # Sorted so a given set of ids maps to the same chunks (and cached ETags) each time
+    unique_ids = sorted(set(video_ids))
+    results: Dict[str, Dict[str, Optional[str]]] = {}
+    if not unique_ids:
+        return results
+    url = f"{settings.youtube_api_base_url}/videos"
+    for chunk in _chunked(unique_ids):
+        params = {"part": "statistics,snippet", "id": ",".join(chunk), "key": api_key}
+        for item in _youtube_get_json("videos.list", url, params).get("items", []):
+            results[item.get("id")] = _parse_video_item(item)
+    return results
+
+
+async def fetch_videos_details_batch_async(
+    api_key: str, video_ids: Iterable[str]
+) -> Dict[str, Dict[str, Optional[str]]]:
+    """Async fetch_videos_details_batch; the 50-id chunks are requested concurrently."""
+    unique_ids = sorted(set(video_ids))
+    url = f"{settings.youtube_api_base_url}/videos"
+    pages = await asyncio.gather(
+        *(
+            _youtube_get_json_async(
+                "videos.list", url, {"part": "statistics,snippet", "id": ",".join(chunk), "key": api_key}
+            )
+            for chunk in _chunked(unique_ids)
+        )
     )
-    with httpx.Client(timeout=10) as client:
-        res = client.get(url)
-        res.raise_for_status()
-        data = res.json()
-        items = data.get("items", [])
-        if not items:
-            return {
-                "likeCount": 0,
-                "viewCount": 0,
-                "channelId": None,
-                "channelTitle": None,
-            }
-        item = items[0]
-        stats = item.get("statistics", {})
-        snippet = item.get("snippet", {})
-        return {
-            "likeCount": int(stats.get("likeCount", 0)),
-            "viewCount": int(stats.get("viewCount", 0)),
-            "channelId": snippet.get("channelId"),
-            "channelTitle": snippet.get("channelTitle"),
-        }
+    return {item.get("id"): _parse_video_item(item) for page in pages for item in page.get("items", [])}
 
 
+def fetch_channels_stats_batch(api_key: str, channel_ids: Iterable[str]) -> Dict[str, Dict[str, int]]:
+    """Batched fetch_channel_stats: returns {channel_id: {"subscriberCount": n}}."""
+    unique_ids = sorted({c for c in channel_ids if c})
+    results: Dict[str, Dict[str, int]] = {}
+    if not unique_ids:
+        return results
+    url = f"{settings.youtube_api_base_url}/channels"
+    for chunk in _chunked(unique_ids):
+        params = {"part": "statistics", "id": ",".join(chunk), "key": api_key}
+        for item in _youtube_get_json("channels.list", url, params).get("items", []):
+            stats = item.get("statistics", {})
+            results[item.get("id")] = {"subscriberCount": int(stats.get("subscriberCount", 0))}
+    return results
@@ -0,0 +1,188 @@
+import asyncio
+import logging
+import math
+import threading
+import time
+from datetime import date, datetime, timedelta
+from typing import Dict, Optional
+from zoneinfo import ZoneInfo
+
+from sqlalchemy import text
+
+from ..core.config import settings
+from ..db.session import get_engine
+from .background import PeriodicJob
+
+
+logger = logging.getLogger("youtube_quota")
+
+# YouTube Data API v3 unit costs for the endpoints we call
+ENDPOINT_COSTS: Dict[str, int] = {
+    "videos.list": 1,
+    "channels.list": 1,
+}
+
+# videos.list / channels.list accept up to 50 comma-separated ids per call
+YOUTUBE_MAX_IDS_PER_CALL = 50
+
+# The daily quota resets at midnight Pacific time
+_QUOTA_TZ = ZoneInfo("America/Los_Angeles")
+
+# Adds this process's pending units to the day's shared counter and reads the total back
+_CHARGE_SQL = text(
+    """
+    INSERT INTO youtube_quota_usage (day, used, exhausted) VALUES (:day, :units, :exhausted)
+    ON CONFLICT (day) DO UPDATE
+    SET used = youtube_quota_usage.used + EXCLUDED.used,
+        exhausted = youtube_quota_usage.exhausted OR EXCLUDED.exhausted
+    RETURNING used, exhausted
+    """
+)
+
+
+class QuotaExhaustedError(ValueError):
+    pass
+
+
+class YouTubeQuota:
+    """Accountant for the daily YouTube Data API budget.
+
+    Every worker spends the same project quota, so usage is kept in one
+    ``youtube_quota_usage`` row per day. Calls are counted in memory and
+    ``flush`` (run every YOUTUBE_QUOTA_SYNC_SECONDS) adds them to that row and
+    reads back everyone's total, so checks never wait on the database and the
+    row takes one update per worker per interval. Interactive calls (adding a
+    video) may spend the whole budget; background refreshes stop at
+    ``budget - reserve`` so adds keep working when refresh traffic is heavy.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._day = self._today()
+        self._used = 0
+        self._exhausted = False
+        # Not yet added to the shared row
+        self._pending = 0
+        self._pending_exhausted = False
+        self._synced_at: Optional[float] = None
+        # This process's calls only (diagnostics)
+        self._by_endpoint: Dict[str, int] = {}
+
+    @staticmethod
+    def _today() -> date:
+        return datetime.now(_QUOTA_TZ).date()
+
+    def _roll_day(self, today: date) -> None:
+        if today != self._day:
+            self._day = today
+            self._used = 0
+            self._by_endpoint = {}
+            self._exhausted = False
+            self._pending = 0
+            self._pending_exhausted = False
+            self._synced_at = None
+
+    def flush(self) -> None:
+        """Add this process's pending usage to the shared counter and refresh the cached total."""
+        with self._lock:
+            self._roll_day(self._today())
+            day, units, exhausted = self._day, self._pending, self._pending_exhausted
+            self._pending, self._pending_exhausted = 0, False
+        try:
+            with get_engine().begin() as conn:
+                used, shared_exhausted = conn.execute(
+                    _CHARGE_SQL, {"day": day, "units": units, "exhausted": exhausted}
+                ).one()
+        except Exception as e:
+            # Keep limiting this process on its own counts and retry next time
+            logger.warning("shared YouTube quota counter unavailable, counting locally: %s", e)
+            with self._lock:
+                if day == self._day:
+                    self._pending += units
+                    self._pending_exhausted = self._pending_exhausted or exhausted
+            return
+        with self._lock:
+            if day != self._day:
+                return
+            # Calls recorded while we were flushing are not in the shared total yet
+            self._used = used + self._pending
+            self._exhausted = self._exhausted or shared_exhausted
+            self._synced_at = time.monotonic()
+
+    def _limit(self, interactive: bool) -> int:
+        budget = settings.youtube_daily_quota
+        return budget if interactive else budget - settings.youtube_interactive_reserve
+
+    def record(self, endpoint: str, calls: int = 1) -> None:
+        units = ENDPOINT_COSTS.get(endpoint, 1) * calls
+        with self._lock:
+            self._roll_day(self._today())
+            self._by_endpoint[endpoint] = self._by_endpoint.get(endpoint, 0) + units
+            self._used += units
+            self._pending += units
+
+    def mark_exhausted(self) -> None:
+        """YouTube answered quotaExceeded: stop spending until the next reset."""
+        with self._lock:
+            self._roll_day(self._today())
+            self._exhausted = True
+            self._pending_exhausted = True
+
+    def remaining(self, interactive: bool = True) -> int:
+        with self._lock:
+            self._roll_day(self._today())
+            if self._exhausted:
+                return 0
+            return max(0, self._limit(interactive) - self._used)
+
+    def ensure_available(self, units: int, interactive: bool = True) -> None:
+        if self.remaining(interactive) < units:
+            raise QuotaExhaustedError("YouTube quota exhausted for today, please try again later")
+
+    def background_video_limit(self, max_videos: int, interval_seconds: int) -> int:
+        """How many videos a background refresh cycle may touch right now.
+
+        The remaining background budget is spread evenly over the cycles left
+        until the daily reset, so refreshes slow down as the budget drains and
+        stop (defer to the next cycle) once nothing is left for this one.
+        """
+        remaining = self.remaining(interactive=False)
+        now = datetime.now(_QUOTA_TZ)
+        reset_at = datetime.combine(now.date() + timedelta(days=1), datetime.min.time(), tzinfo=_QUOTA_TZ)
+        cycles_left = max(1, math.ceil((reset_at - now).total_seconds() / max(1, interval_seconds)))
+        units_this_cycle = remaining // cycles_left
+        # Worst case a full batch of ids costs one videos.list plus one channels.list call
+        batch_cost = ENDPOINT_COSTS["videos.list"] + ENDPOINT_COSTS["channels.list"]
+        return min(max_videos, (units_this_cycle // batch_cost) * YOUTUBE_MAX_IDS_PER_CALL)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            self._roll_day(self._today())
+            budget = settings.youtube_daily_quota
+            return {
+                "day": self._day.isoformat(),
+                "daily_budget": budget,
+                "interactive_reserve": settings.youtube_interactive_reserve,
+                "used": self._used,
+                "used_by_endpoint_this_process": dict(self._by_endpoint),
+                "remaining": 0 if self._exhausted else max(0, budget - self._used),
+                "remaining_background": 0 if self._exhausted else max(0, self._limit(False) - self._used),
+                "exhausted": self._exhausted,
+                "pending_sync": self._pending,
+                "synced_seconds_ago": None if self._synced_at is None else round(time.monotonic() - self._synced_at, 1),
+            }
+
+
+youtube_quota = YouTubeQuota()
+
+quota_sync_job = PeriodicJob("youtube_quota_sync", youtube_quota.flush, lambda: settings.youtube_quota_sync_seconds)
+
+
+def start_youtube_quota_sync() -> None:
+    quota_sync_job.start()
+
+
+async def stop_youtube_quota_sync() -> None:
+    await quota_sync_job.stop()
+    # Don't lose the last interval's calls
+    await asyncio.to_thread(youtube_quota.flush)
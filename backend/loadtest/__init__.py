@@ -0,0 +1 @@
+# Offline load-testing helpers (not shipped in the API image)
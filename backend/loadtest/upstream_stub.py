@@ -0,0 +1,128 @@
+"""
+Local stand-in for the YouTube Data API and Clerk backend API.
+
+Serves the three upstream calls the backend makes:
+  GET /youtube/v3/videos?part=...&id=a,b,c
+  GET /youtube/v3/channels?part=...&id=a,b | mine=true
+  GET /v1/users/{user_id}/oauth_access_tokens/oauth_google
+
+Run it and point the backend at it:
+  uvicorn loadtest.upstream_stub:app --port 9000
+  YOUTUBE_API_BASE_URL=http://localhost:9000/youtube/v3 \
+  CLERK_API_BASE_URL=http://localhost:9000/v1 \
+  uvicorn app.main:app --port 8000
+
+Env knobs:
+  STUB_LATENCY_MS         base latency added to every response (default 80)
+  STUB_JITTER_MS          uniform random extra latency (default 40)
+  STUB_ERROR_RATE         fraction of requests answered with 500 (default 0)
+  STUB_QUOTA_ERROR_RATE   fraction answered with 403 quotaExceeded (default 0)
+  STUB_CHANNEL_ID         channel that owns every synthetic video and is
+                          returned for mine=true (default UCstubchannel0000000000)
+  STUB_RECORDINGS         optional JSON file {"videos": {id: item}, "channels": {id: item}}
+                          of recorded API items served instead of synthetic ones
+"""
+
+import asyncio
+import hashlib
+import json
+import os
+import random
+import time
+from typing import Optional
+
+from fastapi import FastAPI, Query, Request, Response
+from fastapi.responses import JSONResponse
+
+
+LATENCY_MS = float(os.getenv("STUB_LATENCY_MS", "80"))
+JITTER_MS = float(os.getenv("STUB_JITTER_MS", "40"))
+ERROR_RATE = float(os.getenv("STUB_ERROR_RATE", "0"))
+QUOTA_ERROR_RATE = float(os.getenv("STUB_QUOTA_ERROR_RATE", "0"))
+CHANNEL_ID = os.getenv("STUB_CHANNEL_ID", "UCstubchannel0000000000")
+
+_STARTED = time.time()
+_recordings: dict = {"videos": {}, "channels": {}}
+if os.getenv("STUB_RECORDINGS"):
+    with open(os.environ["STUB_RECORDINGS"]) as f:
+        _recordings.update(json.load(f))
+
+app = FastAPI(title="MarkFair upstream stub")
+
+
+def _seed(value: str) -> int:
+    return int(hashlib.sha256(value.encode()).hexdigest()[:8], 16)
+
+
+async def _simulate() -> Optional[Response]:
+    delay = LATENCY_MS + random.uniform(0, JITTER_MS)
+    if delay > 0:
+        await asyncio.sleep(delay / 1000)
+    roll = random.random()
+    if roll < QUOTA_ERROR_RATE:
+        return JSONResponse(
+            status_code=403,
+            content={"error": {"code": 403, "errors": [{"reason": "quotaExceeded"}]}},
+        )
+    if roll < QUOTA_ERROR_RATE + ERROR_RATE:
+        return JSONResponse(status_code=500, content={"error": {"code": 500, "message": "injected"}})
+    return None
+
+
+def _video_item(video_id: str) -> dict:
+    if video_id in _recordings["videos"]:
+        return _recordings["videos"][video_id]
+    seed = _seed(video_id)
+    # Views grow slowly so refreshes see movement within an hour
+    elapsed_min = int((time.time() - _STARTED) // 60)
+    views = seed % 100_000 + elapsed_min * (seed % 7 + 1)
+    return {
+        "kind": "youtube#video",
+        "id": video_id,
+        "snippet": {"channelId": CHANNEL_ID, "channelTitle": "Stub Channel", "title": f"Video {video_id}"},
+        "statistics": {"viewCount": str(views), "likeCount": str(views // 20), "commentCount": "0"},
+    }
+
+
+def _channel_item(channel_id: str) -> dict:
+    if channel_id in _recordings["channels"]:
+        return _recordings["channels"][channel_id]
+    return {
+        "kind": "youtube#channel",
+        "id": channel_id,
+        "statistics": {"subscriberCount": str(_seed(channel_id) % 1_000_000), "videoCount": "42"},
+    }
+
+
+def _list_response(request: Request, kind: str, items: list) -> Response:
+    body = json.dumps({"kind": kind, "items": items, "pageInfo": {"totalResults": len(items)}}, sort_keys=True)
+    etag = '"' + hashlib.sha1(body.encode()).hexdigest() + '"'
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers={"ETag": etag})
+    return Response(content=body, media_type="application/json", headers={"ETag": etag})
+
+
+@app.get("/youtube/v3/videos")
+async def videos(request: Request, id: str = Query(""), part: str = Query("statistics")):
+    injected = await _simulate()
+    if injected is not None:
+        return injected
+    ids = [i for i in id.split(",") if i][:50]
+    return _list_response(request, "youtube#videoListResponse", [_video_item(i) for i in ids])
+
+
+@app.get("/youtube/v3/channels")
+async def channels(request: Request, id: str = Query(""), mine: bool = False, part: str = Query("statistics")):
+    injected = await _simulate()
+    if injected is not None:
+        return injected
+    ids = [CHANNEL_ID] if mine else [i for i in id.split(",") if i][:50]
+    return _list_response(request, "youtube#channelListResponse", [_channel_item(i) for i in ids])
+
+
+@app.get("/v1/users/{user_id}/oauth_access_tokens/oauth_google")
+async def oauth_google_tokens(user_id: str):
+    injected = await _simulate()
+    if injected is not None:
+        return injected
+    return [{"provider": "oauth_google", "token": f"stub-google-token-{user_id}", "scopes": ["youtube.readonly"]}]
@@ -1,13 +1,15 @@
 """
 Minimal tests for pools endpoints:
   1) POST /api/pools → returns { pool_id, message: submitted }
-  2) GET  /api/pools/{id} → poll until status in { created, failed }
+  2) GET  /api/pools/{id}/events → SSE stream until status in { created, failed }
+     (POOL_WAIT=poll polls GET /api/pools/{id} instead)
 
 Auth:
   - Preferred: JWT_TOKEN env (Clerk JWT)
   - Dev: TEST_USER_ID with TEST_MODE=true (sends X-Test-User-ID header)
 """
 
+import json
 import os
 import sys
 import time
@@ -74,6 +76,20 @@ def poll_pool(api_base: str, headers: dict, pool_id: str, timeout_s: int = 120,
     raise TimeoutError("Polling timed out")
 
 
+def watch_pool(api_base: str, headers: dict, pool_id: str, timeout_s: int = 120) -> dict:
+    url = f"{api_base}/api/pools/{pool_id}/events"
+    with requests.get(url, headers=headers, stream=True, timeout=(15, timeout_s)) as r:
+        if r.status_code != 200:
+            raise RuntimeError(f"GET {url} failed: {r.status_code} {r.text}")
+        data: dict = {}
+        for line in r.iter_lines(decode_unicode=True):
+            if line and line.startswith("data:"):
+                data = json.loads(line[len("data:"):])
+                print("status:", data.get("status"), "tx:", data.get("tx_hash"))
+        # The server closes the stream once the pool is created or failed
+        return data
+
+
 def main() -> int:
     load_dotenv_if_present()
     api_base = os.getenv("API_BASE", "http://localhost:8000")
@@ -81,7 +97,10 @@ def main() -> int:
     print("API:", api_base)
 
     pool_id = post_pool(api_base, headers)
-    result = poll_pool(api_base, headers, pool_id)
+    if os.getenv("POOL_WAIT") == "poll":
+        result = poll_pool(api_base, headers, pool_id)
+    else:
+        result = watch_pool(api_base, headers, pool_id)
     print("Final:", result)
     if result.get("status") != "created":
         return 2
@@ -0,0 +1,91 @@
+"""
+Bulk pool creation rejects bad items one by one:
+  POST /api/pools/bulk with one valid pool plus one item per rejected case
+  → 200, a pool_id for the valid item, and an error on every bad item's own index
+    (nothing a single item sends may 422 the batch or revert a multicall on chain)
+
+Auth:
+  - Preferred: JWT_TOKEN env (Clerk JWT)
+  - Dev: TEST_USER_ID with TEST_MODE=true (sends X-Test-User-ID header)
+"""
+
+import os
+import sys
+
+import requests
+
+from test_pools import get_auth_headers, load_dotenv_if_present
+
+BRAND = os.getenv("TEST_BRAND_ADDR", "0x0299970ba982112ab018832b2875ff750409d5239c1cc056e98402d8d53bd148")
+TOKEN = os.getenv("TEST_TOKEN_ADDR", "0x075d470cb627938cb8f835fd01cab06b7fab0fbe4b2eeb2f6e6175edad0f98ec")
+DEADLINE = int(os.getenv("TEST_DEADLINE_TS", "1761968731"))
+REFUND = int(os.getenv("TEST_REFUND_TS", "1762573531"))
+
+
+def pool(**overrides) -> dict:
+    item = {
+        "brand": BRAND,
+        "token": TOKEN,
+        "deadline_ts": DEADLINE,
+        "refund_after_ts": REFUND,
+        "task_title": "Bulk test",
+        "description": "Demo",
+    }
+    item.update(overrides)
+    return {k: v for k, v in item.items() if v is not ...}
+
+
+# name -> item that must come back with an error
+REJECTED = {
+    "brand not hex": pool(brand="brand"),
+    "brand zero": pool(brand="0x0"),
+    "brand out of felt range": pool(brand=hex(2**251)),
+    "token missing": pool(token=...),
+    "token zero": pool(token="0x00"),
+    "deadline zero": pool(deadline_ts=0),
+    "deadline negative": pool(deadline_ts=-5),
+    "deadline not an integer": pool(deadline_ts="soon"),
+    "refund before deadline": pool(refund_after_ts=DEADLINE - 1),
+    "refund equal to deadline": pool(refund_after_ts=DEADLINE),
+    "refund past int32": pool(refund_after_ts=2**31),
+    "title not a string": pool(task_title=42),
+    "not an object": "oops",
+}
+
+
+def main() -> int:
+    load_dotenv_if_present()
+    api_base = os.getenv("API_BASE", "http://localhost:8000")
+    headers = get_auth_headers()
+    print("API:", api_base)
+
+    names = list(REJECTED)
+    items = [pool()] + [REJECTED[n] for n in names]
+    r = requests.post(f"{api_base}/api/pools/bulk", headers=headers, json={"pools": items}, timeout=20)
+    if r.status_code != 200:
+        print(f"❌ POST /api/pools/bulk failed: {r.status_code} {r.text}")
+        return 1
+    results = {res["index"]: res for res in r.json()["results"]}
+
+    passed = total = 0
+    total += 1
+    if results[0].get("pool_id") and not results[0].get("error"):
+        passed += 1
+        print(f"✅ valid item created: pool_id {results[0]['pool_id']}")
+    else:
+        print(f"❌ valid item: {results[0]}")
+    for i, name in enumerate(names, start=1):
+        total += 1
+        res = results[i]
+        if res.get("error") and not res.get("pool_id"):
+            passed += 1
+            print(f"✅ {name}: {res['error']}")
+        else:
+            print(f"❌ {name}: expected an error, got {res}")
+
+    print(f"Results: {passed}/{total} checks passed")
+    return 0 if passed == total else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
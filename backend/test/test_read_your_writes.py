@@ -0,0 +1,60 @@
+"""
+Read-your-writes across workers: a pool created through one API process must be
+readable through another right away, even when that process would otherwise
+read from a lagging replica.
+
+  1) POST /api/pools            on API_BASE
+  2) GET  /api/pools/{id}       on API_BASE_2 immediately → the pool, not "not found"
+
+Setup: run two API processes (or two hosts behind different ports) against the
+same DATABASE_URL with DATABASE_REPLICA_URL set. To make the lag deterministic,
+point DATABASE_REPLICA_URL at a separate, migrated database that never receives
+the writes; every read that wrongly goes to the replica then misses.
+
+  API_BASE=http://localhost:8000 API_BASE_2=http://localhost:8001 python backend/test/test_read_your_writes.py
+
+Auth:
+  - Preferred: JWT_TOKEN env (Clerk JWT)
+  - Dev: TEST_USER_ID with TEST_MODE=true (sends X-Test-User-ID header)
+"""
+
+import os
+import sys
+
+import requests
+
+from test_pools import get_auth_headers, load_dotenv_if_present, post_pool
+
+
+def read_back(api_base: str, headers: dict, pool_id: str) -> bool:
+    r = requests.get(f"{api_base}/api/pools/{pool_id}", headers=headers, timeout=15)
+    if r.status_code != 200:
+        print(f"❌ GET /api/pools/{pool_id} failed: {r.status_code} {r.text}")
+        return False
+    data = r.json()
+    if data.get("pool_id") != pool_id:
+        print(f"❌ Pool {pool_id} not visible on {api_base}: {data}")
+        return False
+    print(f"✅ Pool {pool_id} visible on {api_base} (status {data.get('status')})")
+    return True
+
+
+def main() -> int:
+    load_dotenv_if_present()
+    writer = os.getenv("API_BASE", "http://localhost:8000")
+    reader = os.getenv("API_BASE_2", writer)
+    rounds = int(os.getenv("ROUNDS", "5"))
+    headers = get_auth_headers()
+    print("Writer:", writer, "Reader:", reader)
+
+    passed = 0
+    for _ in range(rounds):
+        pool_id = post_pool(writer, headers)
+        passed += read_back(reader, headers, pool_id)
+
+    print(f"Results: {passed}/{rounds} reads saw the write")
+    return 0 if passed == rounds else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())